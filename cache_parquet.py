@@ -0,0 +1,154 @@
+# cache_parquet.py
+# Caché en disco de los Excel de ARCA ya leídos
+# AIE San Justo
+#
+# Leer el .xlsx con openpyxl es la operación repetida más lenta.
+# El DataFrame de entrada (ya con las columnas normalizadas) se guarda
+# en Parquet, identificado por el SHA-256 del archivo subido y la
+# versión del conversor. Si se vuelve a subir el mismo archivo se
+# lee el Parquet y se evita el Excel por completo.
+
+import hashlib
+import os
+import uuid
+
+import pandas as pd
+
+from configuracion import CACHE_DIR, CACHE_MAX_MB
+
+
+EXTENSION = ".parquet"
+
+
+# ============================================================
+# CLAVES
+# ============================================================
+
+def clave(contenido: bytes, version: str, hoja=None) -> str:
+    """
+    Clave de caché: SHA-256 del archivo (y de la hoja, si no es
+    la primera) + versión del conversor.
+    """
+
+    digest = hashlib.sha256(contenido)
+
+    if hoja is not None:
+        digest.update(f"\0{hoja}".encode())
+
+    return f"{digest.hexdigest()}-{version}"
+
+
+def _ruta(clave_: str):
+
+    return CACHE_DIR / f"{clave_}{EXTENSION}"
+
+
+def _version_de(ruta) -> str:
+
+    return ruta.stem.split("-", 1)[-1]
+
+
+# ============================================================
+# LECTURA / ESCRITURA
+# ============================================================
+
+def leer(clave_: str):
+    """
+    Devuelve el DataFrame guardado o None si no está en caché.
+    """
+
+    if CACHE_MAX_MB == 0:
+        return None
+
+    ruta = _ruta(clave_)
+
+    try:
+        df = pd.read_parquet(ruta)
+
+        # Marcar como usado recientemente (LRU por mtime).
+        os.utime(ruta)
+
+    except (OSError, ImportError, ValueError):
+        return None
+
+    return df
+
+
+def guardar(clave_: str, df: pd.DataFrame) -> bool:
+    """
+    Guarda el DataFrame en caché y aplica el límite de tamaño.
+
+    Devuelve False si no se pudo guardar (por ejemplo, columnas con
+    tipos mezclados que Parquet no admite): la conversión sigue
+    normalmente, solo que ese archivo no queda en caché.
+    """
+
+    if CACHE_MAX_MB == 0:
+        return False
+
+    ruta = _ruta(clave_)
+
+    # Escribir en un temporal y renombrar: otros procesos del pool
+    # nunca ven un archivo a medio escribir.
+
+    tmp = ruta.with_name(f".{uuid.uuid4().hex}.tmp")
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, ruta)
+
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        return False
+
+    podar(_version_de(ruta))
+
+    return True
+
+
+# ============================================================
+# EXPULSIÓN / INVALIDACIÓN
+# ============================================================
+
+def podar(version: str):
+    """
+    Borra las entradas de otras versiones del conversor y, si la
+    caché supera CACHE_MAX_MB, las menos usadas recientemente.
+    """
+
+    entradas = []
+
+    for ruta in CACHE_DIR.glob(f"*{EXTENSION}"):
+
+        try:
+            info = ruta.stat()
+
+            if _version_de(ruta) != version:
+                ruta.unlink()
+                continue
+
+        except OSError:
+            continue
+
+        entradas.append((info.st_mtime, info.st_size, ruta))
+
+    limite = CACHE_MAX_MB * 1024 * 1024
+    total = sum(tam for _, tam, _ in entradas)
+
+    for _, tam, ruta in sorted(entradas):
+
+        if total <= limite:
+            break
+
+        ruta.unlink(missing_ok=True)
+        total -= tam
+
+
+def invalidar():
+    """
+    Vacía la caché completa.
+    """
+
+    for ruta in CACHE_DIR.glob(f"*{EXTENSION}"):
+        ruta.unlink(missing_ok=True)
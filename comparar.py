@@ -0,0 +1,212 @@
+# comparar.py
+# Diferencias entre dos exportaciones de ARCA del mismo cliente
+# AIE San Justo
+#
+# Cada comprobante se identifica con un hash de (emisor, código, punto
+# de venta, número) y sus importes con otro hash. Un único join por
+# clave separa los comprobantes nuevos, eliminados y modificados.
+
+import numpy as np
+import pandas as pd
+
+import conversor
+import cuit
+import metricas
+from conversor import (
+    COL_CUIT_EMISOR,
+    COL_MON,
+    COL_NRO_DESDE,
+    COL_PV,
+    COL_TIPO_AFIP,
+    COL_TOTAL,
+)
+
+
+COL_CLAVE = "_clave"
+COL_HASH_IMPORTES = "_hash_importes"
+
+COL_TOTAL_ANTERIOR = "Imp. Total anterior"
+
+
+# ============================================================
+# HASHES
+# ============================================================
+#
+# El hash depende del tipo de la columna: 5 (int64) y 5.0
+# (float64) dan hashes distintos. Un Punto de Venta vacío o un
+# Tipo Cambio con decimales cambian el tipo que infiere pandas,
+# así que cada parte se lleva a un tipo fijo antes de hashear.
+#
+# ============================================================
+
+def a_enteros(serie: pd.Series) -> pd.Series:
+    """
+    Convierte la columna a enteros con nulos (Int64).
+    Vacíos / texto no numérico -> <NA>.
+    """
+
+    return pd.to_numeric(serie, errors="coerce").round().astype("Int64")
+
+
+def agregar_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega la clave del comprobante y el hash de sus importes.
+    """
+
+    df = df.copy()
+
+    codigos = df[COL_TIPO_AFIP].astype(str).str.strip()
+
+    claves = pd.DataFrame({
+
+        "emisor": cuit.documentos_a_enteros(df[COL_CUIT_EMISOR]),
+
+        "codigo": codigos.map(
+            {c: conversor.get_codigo_arca(c) for c in codigos.unique()}
+        ),
+
+        "pv": a_enteros(df[COL_PV]),
+
+        "numero": a_enteros(df[COL_NRO_DESDE]),
+    })
+
+    # Comprobantes repetidos dentro del mismo archivo:
+    # numerar las apariciones para que el join sea 1 a 1.
+
+    claves["aparicion"] = claves.groupby(
+        list(claves.columns),
+        dropna=False,
+    ).cumcount()
+
+    df[COL_CLAVE] = pd.util.hash_pandas_object(
+        claves,
+        index=False,
+    ).to_numpy()
+
+    importes = df[conversor.columnas_importes(df)].apply(
+        pd.to_numeric,
+        errors="coerce",
+    ).astype(np.float64).fillna(0).round(2)
+
+    if COL_MON in df.columns:
+        importes[COL_MON] = (
+            df[COL_MON].fillna("").astype(str).str.strip().str.upper()
+        )
+
+    df[COL_HASH_IMPORTES] = pd.util.hash_pandas_object(
+        importes,
+        index=False,
+    ).to_numpy()
+
+    return df
+
+
+# ============================================================
+# COMPARACIÓN
+# ============================================================
+
+def comparar(anterior: pd.DataFrame, nuevo: pd.DataFrame):
+    """
+    Compara dos archivos de ARCA (ya leídos y normalizados).
+
+    Devuelve (nuevos, eliminados, modificados) con las filas
+    originales de ARCA. En modificados se agrega el total anterior.
+    """
+
+    anterior = agregar_hashes(anterior.reset_index(drop=True))
+    nuevo = agregar_hashes(nuevo.reset_index(drop=True))
+
+    cruce = nuevo[[COL_CLAVE, COL_HASH_IMPORTES]].reset_index().merge(
+        anterior[[COL_CLAVE, COL_HASH_IMPORTES, COL_TOTAL]]
+        .rename(columns={COL_TOTAL: COL_TOTAL_ANTERIOR})
+        .reset_index(),
+        on=COL_CLAVE,
+        how="outer",
+        suffixes=("", "_ant"),
+        indicator=True,
+    )
+
+    solo_nuevo = cruce["_merge"] == "left_only"
+    solo_anterior = cruce["_merge"] == "right_only"
+
+    cambiado = (cruce["_merge"] == "both") & (
+        cruce[COL_HASH_IMPORTES] != cruce[f"{COL_HASH_IMPORTES}_ant"]
+    )
+
+    columnas = [
+        c for c in nuevo.columns
+        if c not in (COL_CLAVE, COL_HASH_IMPORTES)
+    ]
+
+    nuevos = nuevo.loc[
+        cruce.loc[solo_nuevo, "index"].astype(np.int64),
+        columnas,
+    ]
+
+    eliminados = anterior.loc[
+        cruce.loc[solo_anterior, "index_ant"].astype(np.int64),
+        [c for c in columnas if c in anterior.columns],
+    ]
+
+    modificados = nuevo.loc[
+        cruce.loc[cambiado, "index"].astype(np.int64),
+        columnas,
+    ].copy()
+
+    modificados[COL_TOTAL_ANTERIOR] = cruce.loc[
+        cambiado,
+        COL_TOTAL_ANTERIOR,
+    ].to_numpy()
+
+    return nuevos, eliminados, modificados
+
+
+def comparar_archivos(contenido_anterior: bytes, contenido_nuevo: bytes) -> tuple:
+    """
+    Lee ambos archivos, los compara y convierte a formato Holistor
+    solo los comprobantes nuevos y modificados.
+
+    Devuelve (comparacion, medidas). Es la unidad de trabajo que
+    se envía al pool.
+    """
+
+    medidas = {
+        "bytes_entrada": len(contenido_anterior) + len(contenido_nuevo),
+    }
+
+    with metricas.cronometro(medidas, "lectura"):
+        df_anterior = conversor.leer_entrada(contenido_anterior)
+        df_nuevo = conversor.leer_entrada(contenido_nuevo)
+
+    with metricas.cronometro(medidas, "comparacion"):
+        nuevos, eliminados, modificados = comparar(
+            df_anterior,
+            df_nuevo,
+        )
+
+    cambios = pd.concat(
+        [nuevos, modificados.drop(columns=COL_TOTAL_ANTERIOR)],
+        ignore_index=True,
+    )
+
+    with metricas.cronometro(medidas, "conversion"):
+        salida = conversor.convertir(cambios)
+
+    with metricas.cronometro(medidas, "excel"):
+        excel_bytes = (
+            b"" if salida.empty else conversor.generar_excel(salida)
+        )
+
+    medidas["filas_entrada"] = len(df_anterior) + len(df_nuevo)
+    medidas["filas_salida"] = len(salida)
+    medidas["memoria_pico"] = metricas.memoria_pico()
+
+    comparacion = {
+        "nuevos": nuevos,
+        "eliminados": eliminados,
+        "modificados": modificados,
+        "salida": salida,
+        "excel": excel_bytes,
+    }
+
+    return comparacion, medidas
@@ -0,0 +1,307 @@
+# conciliacion.py
+# Hoja de control de totales contra ARCA
+# AIE San Justo
+#
+# Resume la salida por Tipo / Letra / Alícuota con group-by (sin
+# recorrer fila por fila) y compara los totales con la suma del
+# Imp. Total original de ARCA.
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# COLUMNAS INTERNAS DE LA SALIDA
+# ============================================================
+#
+# El conversor las agrega a la salida para este control; no se
+# escriben en la hoja "Salida" que se importa en Holistor.
+#
+# ============================================================
+
+# Imp. Total de ARCA (con signo y en pesos), solo en la primera
+# fila de cada comprobante.
+COL_TOTAL_ARCA = "_total_arca"
+
+# Primera fila del comprobante (para contar comprobantes).
+COL_PRIMERA = "_primera"
+
+COL_AJUSTADO = "_ajustado"
+COL_USD = "_usd"
+COL_NC = "_nota_credito"
+COL_DOC_INVALIDO = "_doc_invalido"
+
+COLS_INTERNAS = [
+    COL_TOTAL_ARCA,
+    COL_PRIMERA,
+    COL_AJUSTADO,
+    COL_USD,
+    COL_NC,
+    COL_DOC_INVALIDO,
+]
+
+
+# Identifican un comprobante (sus filas pueden estar en varias
+# alícuotas).
+
+COLUMNAS_COMPROBANTE = [
+    "Tipo",
+    "Letra",
+    "Punto de Venta",
+    "Número Desde",
+    "Nro. Doc. Emisor",
+]
+
+CONTADORES = {
+    "Comprobantes": None,
+    "Ajustados": COL_AJUSTADO,
+    "USD": COL_USD,
+    "Notas de Crédito": COL_NC,
+}
+
+NOTA_CONTADORES = (
+    "Comprobantes, Ajustados, USD y Notas de Crédito: en cada "
+    "alícuota, comprobantes distintos con alguna fila en ella (un "
+    "comprobante con varias alícuotas aparece en cada una); en "
+    "Subtotal y TOTAL, cada comprobante una sola vez."
+)
+
+
+IMPORTES = [
+    "Neto",
+    "IVA",
+    "Ex/Ng",
+    "Otros Conceptos",
+    "Total",
+]
+
+COL_ARCA = "Imp. Total ARCA"
+COL_DIFERENCIA = "Diferencia"
+
+HOJA = "Control"
+
+
+# ============================================================
+# RESUMEN
+# ============================================================
+
+def clave_comprobante(salida: pd.DataFrame) -> np.ndarray:
+    """
+    Hash de las columnas que identifican cada comprobante.
+    """
+
+    claves = salida[COLUMNAS_COMPROBANTE].copy()
+
+    claves["Nro. Doc. Emisor"] = claves["Nro. Doc. Emisor"].astype(str)
+
+    return pd.util.hash_pandas_object(
+        claves,
+        index=False,
+    ).to_numpy()
+
+
+def resumen(salida: pd.DataFrame) -> pd.DataFrame:
+    """
+    Totales por Tipo / Letra / Alícuota.
+
+    Devuelve una fila por grupo más una fila de subtotal por
+    Tipo / Letra y una de total general. Imp. Total ARCA y la
+    Diferencia se informan en los subtotales y el total: cada
+    comprobante con varias alícuotas aporta su total de ARCA una
+    sola vez, así que solo se comparan a nivel comprobante.
+
+    Los contadores se calculan como indica NOTA_CONTADORES.
+    """
+
+    comprobante = clave_comprobante(salida)
+
+    # Clave del comprobante solo en las filas que cuentan para
+    # cada contador (NaN en las demás: nunique las ignora).
+
+    datos = salida.assign(**{
+        nombre: (
+            comprobante
+            if col is None
+            else np.where(salida[col].to_numpy(dtype=bool), comprobante, np.nan)
+        )
+        for nombre, col in CONTADORES.items()
+    })
+
+    sumas = IMPORTES + [COL_TOTAL_ARCA] + list(CONTADORES)
+
+    por_grupo = datos.groupby(["Tipo", "Letra", "Alicuota"], dropna=False)
+
+    grupos = pd.concat(
+        [
+            por_grupo[IMPORTES + [COL_TOTAL_ARCA]].sum(),
+            por_grupo[list(CONTADORES)].nunique(),
+        ],
+        axis=1,
+    ).reset_index()
+
+
+    # Contadores de los subtotales: la primera fila de cada
+    # comprobante (cada uno pertenece a un solo Tipo / Letra).
+
+    primera = salida[COL_PRIMERA].to_numpy(dtype=bool)
+
+    por_tipo = (
+        pd.DataFrame({
+            "Tipo": salida["Tipo"],
+            "Letra": salida["Letra"],
+            **{
+                nombre: (
+                    primera
+                    if col is None
+                    else primera & salida[col].to_numpy(dtype=bool)
+                ).astype(int)
+                for nombre, col in CONTADORES.items()
+            },
+        })
+        .groupby(["Tipo", "Letra"], dropna=False)
+        .sum()
+    )
+
+
+    # Subtotales y total general sobre el resultado agrupado
+    # (pocas filas; no se vuelve a recorrer la salida).
+
+    filas = []
+
+    for (tipo, letra), bloque in grupos.groupby(
+        ["Tipo", "Letra"],
+        dropna=False,
+        sort=True,
+    ):
+
+        filas.append(bloque.assign(**{COL_TOTAL_ARCA: None}))
+
+        subtotal = bloque[sumas].sum()
+        subtotal[list(CONTADORES)] = por_tipo.loc[(tipo, letra)]
+        subtotal["Tipo"] = tipo
+        subtotal["Letra"] = letra
+        subtotal["Alicuota"] = "Subtotal"
+
+        filas.append(subtotal.to_frame().T)
+
+    total = grupos[sumas].sum()
+    total[list(CONTADORES)] = por_tipo.sum()
+    total["Tipo"] = "TOTAL"
+    total["Letra"] = ""
+    total["Alicuota"] = ""
+
+    filas.append(total.to_frame().T)
+
+    tabla = pd.concat(filas, ignore_index=True)
+
+    tabla[list(CONTADORES)] = tabla[list(CONTADORES)].astype(int)
+
+    tabla = tabla.rename(columns={COL_TOTAL_ARCA: COL_ARCA})
+
+    tabla[COL_DIFERENCIA] = (
+        pd.to_numeric(tabla["Total"])
+        - pd.to_numeric(tabla[COL_ARCA])
+    ).round(2)
+
+    return tabla[
+        ["Tipo", "Letra", "Alicuota", "Comprobantes"]
+        + IMPORTES
+        + [COL_ARCA, COL_DIFERENCIA, "Ajustados", "USD", "Notas de Crédito"]
+    ]
+
+
+def contadores(salida: pd.DataFrame) -> dict:
+    """
+    Cantidad de comprobantes por situación especial.
+    """
+
+    primera = salida[COL_PRIMERA].astype(bool)
+
+    return {
+        "Comprobantes": int(primera.sum()),
+        "Filas de salida": len(salida),
+        "Ajustados por IA": int((primera & salida[COL_AJUSTADO]).sum()),
+        "Convertidos desde USD": int((primera & salida[COL_USD]).sum()),
+        "Notas de Crédito": int((primera & salida[COL_NC]).sum()),
+        "Doc. emisor inválido": int((primera & salida[COL_DOC_INVALIDO]).sum()),
+    }
+
+
+# ============================================================
+# HOJA DE EXCEL
+# ============================================================
+
+def escribir_hoja(writer: pd.ExcelWriter, salida: pd.DataFrame):
+    """
+    Agrega la hoja "Control" al libro que se está generando.
+    """
+
+    tabla = resumen(salida)
+
+    workbook = writer.book
+
+    tabla.to_excel(
+        writer,
+        sheet_name=HOJA,
+        index=False,
+        startrow=2,
+    )
+
+    worksheet = writer.sheets[HOJA]
+
+    titulo_format = workbook.add_format({"bold": True, "font_size": 12})
+    money_format = workbook.add_format({"num_format": "#,##0.00"})
+    bold_format = workbook.add_format({"bold": True})
+
+    diferencia_format = workbook.add_format(
+        {
+            "bg_color": "#FFC7CE",
+            "font_color": "#9C0006",
+        }
+    )
+
+    worksheet.write(0, 0, "Control de totales contra ARCA", titulo_format)
+    worksheet.write(1, 0, NOTA_CONTADORES)
+
+    col_idx = {
+        name: i
+        for i, name in enumerate(tabla.columns)
+    }
+
+    worksheet.set_column(0, 2, 10)
+    worksheet.set_column(col_idx["Comprobantes"], col_idx["Comprobantes"], 13)
+
+    for nombre in IMPORTES + [COL_ARCA, COL_DIFERENCIA]:
+        j = col_idx[nombre]
+        worksheet.set_column(j, j, 15, money_format)
+
+
+    # Resaltar diferencias (filas de subtotal / total).
+
+    primera_fila = 3
+    ultima_fila = primera_fila + len(tabla) - 1
+    j = col_idx[COL_DIFERENCIA]
+
+    worksheet.conditional_format(
+        primera_fila,
+        j,
+        ultima_fila,
+        j,
+        {
+            "type": "cell",
+            "criteria": "not between",
+            "minimum": -0.005,
+            "maximum": 0.005,
+            "format": diferencia_format,
+        },
+    )
+
+
+    # Contadores debajo de la tabla.
+
+    fila = ultima_fila + 3
+
+    for nombre, valor in contadores(salida).items():
+        worksheet.write(fila, 0, nombre, bold_format)
+        worksheet.write(fila, 3, valor)
+        fila += 1
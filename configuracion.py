@@ -0,0 +1,220 @@
+# configuracion.py
+# Parámetros configurables por variables de entorno
+# AIE San Justo
+
+import os
+import tempfile
+from pathlib import Path
+
+
+# ============================================================
+# LECTURA DE VARIABLES DE ENTORNO
+# ============================================================
+
+def entero_env(nombre: str, defecto: int) -> int:
+    """
+    Devuelve la variable de entorno como entero.
+    Vacía / inválida -> valor por defecto.
+    """
+
+    valor = os.environ.get(nombre, "").strip()
+
+    if not valor:
+        return defecto
+
+    try:
+        return int(valor)
+
+    except ValueError:
+        return defecto
+
+
+# ============================================================
+# POOL DE CONVERSIÓN
+# ============================================================
+
+# Cantidad de procesos que convierten en paralelo.
+# Por defecto, uno por núcleo.
+
+MAX_PROCESOS = max(
+    1,
+    entero_env(
+        "IARECIBIDOS_MAX_PROCESOS",
+        os.cpu_count() or 1,
+    ),
+)
+
+# Cantidad máxima de conversiones esperando turno.
+# Si se supera, el usuario recibe un aviso para reintentar.
+
+MAX_COLA = max(
+    0,
+    entero_env(
+        "IARECIBIDOS_MAX_COLA",
+        20,
+    ),
+)
+
+
+# ============================================================
+# MODO DE EJECUCIÓN SEGÚN EL TAMAÑO DE LA HOJA
+# ============================================================
+#
+# El tamaño se estima con los metadatos del Excel, antes de leerlo:
+#
+#   - memoria:  hasta MODO_MEMORIA_FILAS filas, en el propio proceso
+#               de Streamlit (sin esperar turno en el pool).
+#   - bloques:  si la memoria estimada supera MODO_BLOQUES_MB, en el
+#               pool, leyendo de a BLOQUE_FILAS filas.
+#   - paralelo: el resto, en el pool (una hoja por proceso).
+#
+# ============================================================
+
+MODO_MEMORIA_FILAS = max(
+    0,
+    entero_env(
+        "IARECIBIDOS_MODO_MEMORIA_FILAS",
+        2000,
+    ),
+)
+
+MODO_BLOQUES_MB = max(
+    1,
+    entero_env(
+        "IARECIBIDOS_MODO_BLOQUES_MB",
+        1024,
+    ),
+)
+
+BLOQUE_FILAS = max(
+    1000,
+    entero_env(
+        "IARECIBIDOS_BLOQUE_FILAS",
+        20000,
+    ),
+)
+
+# memoria / bloques / paralelo -> usar siempre ese modo.
+# Vacío -> elegir según el tamaño.
+
+MODO_FORZADO = os.environ.get(
+    "IARECIBIDOS_MODO",
+    "",
+).strip().lower()
+
+
+# ============================================================
+# CACHÉ DE ARCHIVOS DE ARCA (PARQUET)
+# ============================================================
+
+# Carpeta donde se guardan los Excel de ARCA ya leídos.
+
+CACHE_DIR = Path(
+    os.environ.get(
+        "IARECIBIDOS_CACHE_DIR",
+        "",
+    ).strip()
+    or Path(tempfile.gettempdir()) / "iarecibidos_cache"
+)
+
+# Tamaño máximo de la caché en MB.
+# 0 -> caché desactivada.
+
+CACHE_MAX_MB = max(
+    0,
+    entero_env(
+        "IARECIBIDOS_CACHE_MB",
+        512,
+    ),
+)
+
+
+# ============================================================
+# PADRÓN DE CONTRIBUYENTES
+# ============================================================
+
+# Carpeta con el índice del padrón generado con:
+#   python padron.py padron.zip
+# Si no existe, Condición Fiscal se deduce de la letra.
+
+PADRON_DIR = Path(
+    os.environ.get(
+        "IARECIBIDOS_PADRON_DIR",
+        "",
+    ).strip()
+    or Path(__file__).parent / "padron"
+)
+
+# 1 -> reemplazar Denominación Emisor por la del padrón.
+
+PADRON_DENOMINACION = entero_env(
+    "IARECIBIDOS_PADRON_DENOMINACION",
+    0,
+) == 1
+
+
+# ============================================================
+# HISTÓRICO POR CLIENTE (PARQUET PARTICIONADO)
+# ============================================================
+
+# Carpeta del histórico acumulado:
+#   cliente=<cliente>/anio=<aaaa>/mes=<mm>/datos.parquet
+
+HISTORICO_DIR = Path(
+    os.environ.get(
+        "IARECIBIDOS_HISTORICO_DIR",
+        "",
+    ).strip()
+    or Path(__file__).parent / "historico"
+)
+
+
+# ============================================================
+# INTERCAMBIO CON EL POOL (ARROW IPC)
+# ============================================================
+
+# Carpeta donde los procesos del pool dejan la salida para la UI.
+# Por defecto en la carpeta temporal del sistema: /dev/shm es más
+# rápido pero suele ser chico (64 MB en Docker) y un archivo grande
+# falla con ENOSPC. Para usarlo, IARECIBIDOS_IPC_DIR=/dev/shm/...
+# con espacio suficiente.
+
+IPC_DIR = Path(
+    os.environ.get(
+        "IARECIBIDOS_IPC_DIR",
+        "",
+    ).strip()
+    or Path(tempfile.gettempdir()) / "iarecibidos_ipc"
+)
+
+
+# ============================================================
+# MÉTRICAS (FORMATO PROMETHEUS)
+# ============================================================
+
+# Archivo que se reescribe periódicamente con las métricas
+# (por ejemplo, para el textfile collector de node_exporter).
+# Vacío -> no se escribe.
+
+METRICAS_ARCHIVO = os.environ.get(
+    "IARECIBIDOS_METRICAS_ARCHIVO",
+    "",
+).strip()
+
+METRICAS_INTERVALO = max(
+    1,
+    entero_env(
+        "IARECIBIDOS_METRICAS_INTERVALO",
+        15,
+    ),
+)
+
+# Puerto HTTP local para /metrics. 0 -> desactivado.
+
+METRICAS_PUERTO = max(
+    0,
+    entero_env(
+        "IARECIBIDOS_METRICAS_PUERTO",
+        0,
+    ),
+)
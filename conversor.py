@@ -0,0 +1,1586 @@
+# conversor.py
+# Lógica de conversión ARCA "Recibidos" -> Formato Holistor
+# AIE San Justo
+#
+# Este módulo no depende de Streamlit: se importa tanto desde la app
+# como desde los procesos del pool de conversión.
+
+import re
+
+import pandas as pd
+from io import BytesIO
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
+
+import numpy as np
+
+import cache_parquet
+import conciliacion
+import cuit
+import libro_excel
+import metricas
+import padron
+from configuracion import (
+    BLOQUE_FILAS,
+    MODO_BLOQUES_MB,
+    MODO_FORZADO,
+    MODO_MEMORIA_FILAS,
+    PADRON_DENOMINACION,
+)
+
+
+# Cambiar cada vez que se modifiquen las reglas de lectura o
+# conversión: invalida las entradas de la caché de Parquet.
+
+VERSION_CONVERSOR = "2026.10.4"
+
+
+# ============================================================
+# FUNCIONES DE COMPROBANTES
+# ============================================================
+
+def get_codigo_arca(concepto: str) -> str:
+    """
+    Obtiene el código numérico del comprobante ARCA.
+
+    Ejemplos:
+    '051 - Factura M' -> '51'
+    '52 - Nota de Débito M' -> '52'
+    '063 - Liquidación A' -> '63'
+    """
+    concepto = str(concepto).strip()
+
+    if not concepto:
+        return ""
+
+    codigo = concepto.split("-")[0].strip()
+
+    # Quitar ceros a la izquierda.
+    # Ej: 051 -> 51
+    codigo = codigo.lstrip("0")
+
+    return codigo if codigo else "0"
+
+
+def map_tipo_letra(concepto: str):
+    """
+    Devuelve (Tipo, Letra) según el comprobante de ARCA,
+    adaptado al formato esperado por Holistor.
+    """
+
+    concepto = str(concepto).strip()
+    codigo = get_codigo_arca(concepto)
+
+    # --------------------------------------------------------
+    # NUEVOS COMPROBANTES
+    # --------------------------------------------------------
+
+    # 051 - Factura M
+    if codigo == "51":
+        return "F", "M"
+
+    # 052 - Nota de Débito M
+    # En Holistor todas las Notas de Débito usan Tipo D
+    # independientemente de la letra.
+    if codigo == "52":
+        return "D", "M"
+
+    # 053 - Nota de Crédito M
+    # En Holistor todas las Notas de Crédito usan Tipo C
+    # independientemente de la letra.
+    if codigo == "53":
+        return "C", "M"
+
+    # 063 - Liquidación A
+    # En Holistor se vincula con comprobante LB
+    if codigo == "63":
+        return "LB", "A"
+
+    # --------------------------------------------------------
+    # CASO ESPECIAL EXISTENTE
+    # --------------------------------------------------------
+
+    # 81 - Tique Factura A
+    if codigo == "81" and "Tique Factura A" in concepto:
+        return "T", "A"
+
+    # --------------------------------------------------------
+    # TIPOS GENERALES HOLISTOR
+    # --------------------------------------------------------
+    #
+    # IMPORTANTE:
+    # La letra NO cambia el Tipo de comprobante.
+    #
+    # Nota de Crédito = C
+    # Nota de Débito = D
+    # Factura = F
+    # Recibo = R
+    # --------------------------------------------------------
+
+    if "Nota de Crédito" in concepto:
+        tipo = "C"
+
+    elif "Nota de Débito" in concepto:
+        tipo = "D"
+
+    elif "Recibo" in concepto:
+        tipo = "R"
+
+    elif "Factura" in concepto:
+        tipo = "F"
+
+    else:
+        tipo = ""
+
+    # --------------------------------------------------------
+    # LETRA
+    # --------------------------------------------------------
+
+    # Caso especial existente:
+    # 8 - Nota de Crédito C => Holistor letra B
+    if codigo == "8":
+        letra = "B"
+
+    else:
+        # En general la letra es el último carácter:
+        # A / B / C / M
+        letra = concepto[-1] if concepto else ""
+
+    return tipo, letra
+
+
+# ============================================================
+# NOMBRES DE COLUMNAS SEGÚN ARCA
+# ============================================================
+
+COL_FECHA = "Fecha"
+COL_TIPO_AFIP = "Tipo"
+
+COL_PV = "Punto de Venta"
+COL_NRO_DESDE = "Número Desde"
+COL_NRO_HASTA = "Número Hasta"
+
+COL_TIPO_DOC = "Tipo Doc. Emisor"
+COL_CUIT_EMISOR = "Nro. Doc. Emisor"
+COL_NOM_EMISOR = "Denominación Emisor"
+COL_COD_AUT = "Cód. Autorización"
+
+
+# ------------------------------------------------------------
+# MONEDA / TIPO DE CAMBIO
+# ------------------------------------------------------------
+
+COL_TC = "Tipo Cambio"
+COL_MON = "Moneda"
+
+
+# ------------------------------------------------------------
+# IVA
+# ------------------------------------------------------------
+#
+# Las columnas de cada alícuota se descubren en el encabezado
+# de cada archivo (ver descubrir_aliquotas):
+#
+#   "Neto Grav. IVA 2,5%"  / "IVA 2,5%"
+#   "Neto Grav. IVA 5%"    / "IVA 5%"
+#   "Neto Grav. IVA 10,5%" / "IVA 10,5%"
+#   "Neto Grav. IVA 21%"   / "IVA 21%"
+#   "Neto Grav. IVA 27%"   / "IVA 27%"
+#
+# ------------------------------------------------------------
+
+PATRON_NETO_ALIQ = re.compile(
+    r"^Neto Grav\. IVA\s*(\d+(?:[.,]\d+)?)\s*%$"
+)
+
+PATRON_IVA_ALIQ = re.compile(
+    r"^IVA\s*(\d+(?:[.,]\d+)?)\s*%$"
+)
+
+
+# Si hay monto acá, pasarlo como EXENTO en Ex/Ng
+
+COL_NETO_0 = "Neto Grav. IVA 0%"
+
+
+# ------------------------------------------------------------
+# OTROS IMPORTES
+# ------------------------------------------------------------
+
+COL_NETO_NG = "Neto No Gravado"
+COL_EXENTAS = "Op. Exentas"
+COL_OTROS = "Otros Tributos"
+COL_TOTAL = "Imp. Total"
+
+
+# ------------------------------------------------------------
+# CONTROL
+# ------------------------------------------------------------
+
+# Columna interna: leyendas de control por comprobante.
+
+COL_CONTROL_IA = "Control IA"
+
+CONTROL_AJUSTADO = "AJUSTADO POR IA - CORROBORAR"
+CONTROL_DOC_INVALIDO = "DOC. EMISOR INVÁLIDO - CORROBORAR"
+
+
+# ============================================================
+# FALLBACKS POR POSIBLES CAMBIOS DE NOMBRE EN ARCA
+# ============================================================
+
+ALTERNATIVAS_COLUMNAS = {
+
+    COL_TC: [
+        "Tipo de Cambio",
+    ],
+
+    COL_NETO_0: [
+        "Neto Grav. IVA 0 %",
+    ],
+
+    # Posibles variantes del encabezado de autorización en ARCA
+    COL_COD_AUT: [
+        "Cod. Autorización",
+        "Código Autorización",
+        "Código de Autorización",
+        "Cod. Autorizacion",
+        "Código Autorizacion",
+        "Código de Autorizacion",
+    ],
+}
+
+
+# ============================================================
+# COLUMNAS DE SALIDA
+# ============================================================
+
+cols_salida = [
+
+    "Fecha Emisión",
+
+    "Fecha Recepción",
+
+    "Concepto",
+
+    "Tipo",
+
+    "Letra",
+
+    "Punto de Venta",
+
+    "Número Desde",
+
+    "Número Hasta",
+
+    "Cód. Autorización",
+
+    "Tipo Doc. Emisor",
+
+    "Nro. Doc. Emisor",
+
+    "Denominación Emisor",
+
+    "Condición Fiscal",
+
+    "Tipo Cambio",
+
+    "Moneda",
+
+    "Alicuota",
+
+    "Neto",
+
+    "IVA",
+
+    "Ex/Ng",
+
+    "Otros Conceptos",
+
+    "Total",
+
+    "Control IA",
+]
+
+
+# ============================================================
+# FECHAS
+# ============================================================
+
+PATRON_FECHA_ISO = r"^\d{4}-\d{2}-\d{2}"
+
+
+def a_fechas(serie: pd.Series) -> pd.Series:
+    """
+    Convierte una columna de fechas de la salida a datetime.
+
+    Los textos de ARCA vienen como dd/mm/aaaa (día primero); los
+    que ya están en formato ISO (aaaa-mm-dd) se leen como tales.
+    Lo que no es una fecha queda NaT.
+    """
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    texto = serie.astype(str).str.strip()
+
+    iso = texto.str.match(PATRON_FECHA_ISO).to_numpy()
+
+    fechas = pd.to_datetime(
+        texto.where(~iso),
+        errors="coerce",
+        dayfirst=True,
+    )
+
+    if iso.any():
+        fechas[iso] = pd.to_datetime(
+            texto[iso],
+            errors="coerce",
+            format="ISO8601",
+        )
+
+    return fechas
+
+
+# ============================================================
+# LECTURA DEL EXCEL DE ARCA
+# ============================================================
+
+# Encabezados que identifican una hoja de ARCA "Recibidos" en
+# libros con varias hojas.
+
+COLUMNAS_REQUERIDAS = [
+    COL_FECHA,
+    COL_TIPO_AFIP,
+    COL_PV,
+    COL_NRO_DESDE,
+    COL_CUIT_EMISOR,
+    COL_TOTAL,
+]
+
+
+def hojas_arca(contenido: bytes) -> list:
+    """
+    Hojas del libro con formato de ARCA (ver libro_excel).
+    """
+
+    return libro_excel.hojas_arca(
+        contenido,
+        COLUMNAS_REQUERIDAS,
+    )
+
+
+def leer_excel_arca(contenido: bytes, hoja=0) -> pd.DataFrame:
+    """
+    Lee una hoja del Excel original de ARCA
+    (por defecto, la primera).
+
+    header=1 porque la fila 2 del archivo tiene
+    los encabezados reales.
+    """
+
+    return pd.read_excel(
+        BytesIO(contenido),
+        sheet_name=hoja,
+        header=1,
+    )
+
+
+def _valor_celda(valor):
+
+    # Igual que pandas al leer con openpyxl: vacío -> "" y los
+    # números enteros guardados como float -> int.
+
+    if valor is None:
+        return ""
+
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+
+    return valor
+
+
+def _bloque_a_df(encabezados: list, filas: list) -> pd.DataFrame:
+
+    return TextParser(
+        [encabezados] + filas,
+        header=0,
+    ).read()
+
+
+def leer_excel_arca_bloques(contenido: bytes, hoja=0, filas_bloque=BLOQUE_FILAS):
+    """
+    Lee una hoja del Excel de ARCA de a `filas_bloque` filas, sin
+    tener nunca la hoja entera en memoria.
+
+    Cada bloque sale con los mismos tipos que daría leer_excel_arca
+    (se interpreta con el mismo parser de pandas).
+    """
+
+    libro = load_workbook(
+        BytesIO(contenido),
+        read_only=True,
+        data_only=True,
+    )
+
+    try:
+
+        hoja_ = (
+            libro.worksheets[hoja]
+            if isinstance(hoja, int)
+            else libro[hoja]
+        )
+
+        filas = hoja_.iter_rows(
+            min_row=libro_excel.FILA_ENCABEZADOS,
+            values_only=True,
+        )
+
+        encabezados = [_valor_celda(v) for v in next(filas, ())]
+
+        bloque = []
+
+        for fila in filas:
+
+            bloque.append([_valor_celda(v) for v in fila])
+
+            if len(bloque) >= filas_bloque:
+                yield _bloque_a_df(encabezados, bloque)
+                bloque = []
+
+        if bloque:
+            yield _bloque_a_df(encabezados, bloque)
+
+    finally:
+        libro.close()
+
+
+def normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Renombra las variantes conocidas de encabezados al nombre
+    esperado y agrega las columnas opcionales que falten.
+    """
+
+    df = df.copy()
+
+    for col, alternativas in ALTERNATIVAS_COLUMNAS.items():
+
+        if col in df.columns:
+            continue
+
+        for alternativa in alternativas:
+            if alternativa in df.columns:
+                df = df.rename(columns={alternativa: col})
+                break
+
+
+    # ========================================================
+    # ASEGURAR COLUMNAS
+    # ========================================================
+
+    for c in [
+        COL_TC,
+        COL_MON,
+        COL_NETO_0,
+        COL_COD_AUT,
+    ]:
+        if c not in df.columns:
+
+            if c in [COL_MON, COL_COD_AUT]:
+                df[c] = ""
+
+            else:
+                df[c] = 0.0
+
+    return df
+
+
+def leer_entrada(contenido: bytes, hoja=None) -> pd.DataFrame:
+    """
+    Devuelve el DataFrame de entrada con las columnas normalizadas
+    (de la hoja indicada o, si es None, de la primera).
+
+    Si el mismo archivo ya se leyó con esta versión del conversor,
+    se toma de la caché de Parquet sin abrir el Excel.
+    """
+
+    clave = cache_parquet.clave(
+        contenido,
+        VERSION_CONVERSOR,
+        hoja,
+    )
+
+    df = cache_parquet.leer(clave)
+
+    if df is None:
+
+        df = normalizar_columnas(
+            leer_excel_arca(
+                contenido,
+                0 if hoja is None else hoja,
+            )
+        )
+
+        cache_parquet.guardar(clave, df)
+
+    return df
+
+
+def normalizar_documentos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza Nro. Doc. Emisor (CUIT de 11 dígitos / DNI), define
+    Tipo Doc. Emisor (80 / 86 / 96) y marca en Control IA los
+    documentos inválidos. Todo vectorizado sobre la columna.
+    """
+
+    df = df.copy()
+
+    if COL_CUIT_EMISOR not in df.columns:
+        df[COL_TIPO_DOC] = cuit.TIPO_DOC_CUIT
+        df[COL_CONTROL_IA] = ""
+        return df
+
+    numeros, tipo_doc, valido = cuit.normalizar_documentos(
+        df[COL_CUIT_EMISOR],
+        df.get(COL_TIPO_DOC),
+    )
+
+    df[COL_CUIT_EMISOR] = numeros
+    df[COL_TIPO_DOC] = tipo_doc
+    df[COL_CONTROL_IA] = np.where(
+        valido,
+        "",
+        CONTROL_DOC_INVALIDO,
+    )
+
+    return df
+
+
+# Separa las leyendas de Control IA cuando una fila tiene varias.
+
+SEPARADOR_CONTROL = " | "
+
+
+def agregar_control(actual: np.ndarray, aplicar: np.ndarray, leyenda: str) -> np.ndarray:
+    """
+    Agrega una leyenda a Control IA (donde `aplicar` es True)
+    sin perder las anteriores.
+    """
+
+    actual = np.asarray(actual, dtype=object)
+
+    vacio = (actual == "") | pd.isna(actual)
+
+    return np.where(
+        ~aplicar,
+        actual,
+        np.where(
+            vacio,
+            leyenda,
+            actual + f"{SEPARADOR_CONTROL}{leyenda}",
+        ),
+    )
+
+
+# ============================================================
+# ALÍCUOTAS E IMPORTES
+# ============================================================
+
+def descubrir_aliquotas(columnas) -> list:
+    """
+    Busca en el encabezado los pares Neto / IVA de cada alícuota.
+
+    Devuelve [(alicuota, col_neto, col_iva), ...] ordenado por
+    alícuota. Si falta una de las dos columnas, va None.
+    La alícuota 0% no se incluye: va a Ex/Ng.
+    """
+
+    pares = {}
+
+    for col in columnas:
+
+        nombre = str(col).strip()
+
+        for patron, lado in (
+            (PATRON_NETO_ALIQ, 0),
+            (PATRON_IVA_ALIQ, 1),
+        ):
+
+            m = patron.match(nombre)
+
+            if not m:
+                continue
+
+            aliq = float(m.group(1).replace(",", "."))
+
+            if aliq != 0:
+                pares.setdefault(aliq, [None, None])[lado] = col
+
+    return [
+        (aliq, *pares[aliq])
+        for aliq in sorted(pares)
+    ]
+
+
+def columnas_importes(df: pd.DataFrame) -> list:
+    """
+    Columnas de importes presentes en el archivo
+    (las que identifican un cambio en el comprobante).
+    """
+
+    columnas = [COL_TC]
+
+    for _, col_neto, col_iva in descubrir_aliquotas(df.columns):
+        columnas += [col_neto, col_iva]
+
+    columnas += [
+        COL_NETO_0,
+        COL_NETO_NG,
+        COL_EXENTAS,
+        COL_OTROS,
+        COL_TOTAL,
+    ]
+
+    return [
+        c for c in columnas
+        if c is not None and c in df.columns
+    ]
+
+
+def get_num_col(df: pd.DataFrame, col) -> np.ndarray:
+    """
+    Devuelve la columna como números limpios.
+    Columna inexistente / NaN / vacío / error -> 0
+    """
+
+    if col is None or col not in df.columns:
+        return np.zeros(len(df))
+
+    return (
+        pd.to_numeric(df[col], errors="coerce")
+        .fillna(0.0)
+        .to_numpy(dtype=float)
+    )
+
+
+def atributos_concepto(concepto: str) -> dict:
+    """
+    Datos del comprobante que dependen solo del concepto de ARCA.
+    Se calcula una vez por concepto distinto del archivo.
+    """
+
+    codigo_arca = get_codigo_arca(concepto)
+
+    tipo, letra = map_tipo_letra(concepto)
+
+
+    # ========================================================
+    # NOTAS DE CRÉDITO
+    # ========================================================
+    #
+    # Todas las Notas de Crédito deben RESTAR.
+    #
+    # Incluye:
+    # - NC A
+    # - NC B
+    # - NC C
+    # - 053 Nota de Crédito M
+    #
+    # ========================================================
+
+    es_nc = (
+        codigo_arca == "53"
+        or "Nota de Crédito" in concepto
+    )
+
+
+    # ========================================================
+    # COMPROBANTES CON CONTROL ESPECIAL DE TOTAL
+    # 6  - FACTURA B
+    # 7  - NOTA DE DÉBITO B
+    # 81 - TIQUE FACTURA A
+    # 82 - TIQUE FACTURA B
+    # ========================================================
+
+    es_factura_b_6 = (
+        codigo_arca == "6"
+        and "Factura B" in concepto
+    )
+
+    es_nota_debito_b_7 = (
+        codigo_arca == "7"
+        and "Nota de Débito" in concepto
+        and concepto.endswith("B")
+    )
+
+    es_tique_factura_a_81 = (
+        codigo_arca == "81"
+        and "Tique Factura A" in concepto
+    )
+
+    es_tique_factura_b_82 = (
+        codigo_arca == "82"
+        and "Tique Factura B" in concepto
+    )
+
+    es_comprobante_ajustable = (
+        es_factura_b_6
+        or es_nota_debito_b_7
+        or es_tique_factura_a_81
+        or es_tique_factura_b_82
+    )
+
+    return {
+        "concepto": concepto,
+        "tipo": tipo,
+        "letra": letra,
+        "es_nc": es_nc,
+        "ajustable": es_comprobante_ajustable,
+    }
+
+
+def signo(valor: np.ndarray, es_nc: np.ndarray) -> np.ndarray:
+    """
+    Nota de Crédito -> negativo.
+    Resto -> positivo.
+    """
+
+    return np.where(
+        valor == 0,
+        0.0,
+        np.where(
+            es_nc,
+            -np.abs(valor),
+            np.abs(valor),
+        ),
+    )
+
+
+def columna_filas(df: pd.DataFrame, col, filas: np.ndarray) -> pd.Series:
+    """
+    Valores de la columna para las filas de salida
+    (None si la columna no existe).
+    """
+
+    if col not in df.columns:
+        return pd.Series([None] * len(filas), dtype=object)
+
+    return df[col].take(filas).reset_index(drop=True)
+
+
+# ============================================================
+# PROCESAMIENTO
+# ============================================================
+#
+# Todo el archivo se procesa por columnas: cada comprobante tiene
+# una "ranura" por alícuota descubierta más una ranura final
+# "sin alícuota". Se calculan los importes de todas las ranuras y
+# se pasa de ancho a largo en un solo paso, conservando solo las
+# ranuras con importes.
+#
+# ============================================================
+
+def convertir(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte el DataFrame leído de ARCA al formato Holistor.
+
+    Si no hay comprobantes con importes devuelve un
+    DataFrame vacío con las columnas de salida.
+    """
+
+    df = normalizar_documentos(
+        normalizar_columnas(df)
+    ).reset_index(drop=True)
+
+    n = len(df)
+
+
+    # ========================================================
+    # CONCEPTO (UNA VEZ POR VALOR DISTINTO)
+    # ========================================================
+
+    if COL_TIPO_AFIP in df.columns:
+
+        codigos, unicos = pd.factorize(
+            df[COL_TIPO_AFIP],
+            use_na_sentinel=False,
+        )
+
+    else:
+
+        codigos, unicos = np.zeros(n, dtype=np.int64), [""]
+
+    atributos = pd.DataFrame(
+        [atributos_concepto(str(c).strip()) for c in unicos],
+        columns=["concepto", "tipo", "letra", "es_nc", "ajustable"],
+    )
+
+    concepto = atributos["concepto"].to_numpy(dtype=object)[codigos]
+    tipo = atributos["tipo"].to_numpy(dtype=object)[codigos]
+    letra = atributos["letra"].to_numpy(dtype=object)[codigos]
+    es_nc = atributos["es_nc"].to_numpy(dtype=bool)[codigos]
+    ajustable = atributos["ajustable"].to_numpy(dtype=bool)[codigos]
+
+    con_concepto = concepto != ""
+
+
+    # ========================================================
+    # MONEDA / CONVERSIÓN MONEDA
+    # ========================================================
+    #
+    # Si la moneda es USD, los importes se convierten a pesos
+    # utilizando Tipo Cambio.
+    #
+    # ========================================================
+
+    cod_mon, monedas = pd.factorize(
+        df[COL_MON],
+        use_na_sentinel=False,
+    )
+
+    moneda = np.array(
+        [str(m or "").strip().upper() for m in monedas],
+        dtype=object,
+    )[cod_mon]
+
+    tc = get_num_col(df, COL_TC)
+
+    factor = np.where(
+        (moneda == "USD") & (tc != 0),
+        tc,
+        1.0,
+    )
+
+    def get_num(col) -> np.ndarray:
+        return get_num_col(df, col) * factor
+
+
+    # ========================================================
+    # EXENTO / NO GRAVADO
+    # ========================================================
+    #
+    # Neto No Gravado
+    # + Operaciones Exentas
+    # + Neto Gravado IVA 0%
+    #
+    # ========================================================
+
+    exng_val = signo(
+        get_num(COL_NETO_NG)
+        + get_num(COL_EXENTAS)
+        + get_num(COL_NETO_0),
+        es_nc,
+    )
+
+    otros_val = signo(get_num(COL_OTROS), es_nc)
+
+    total_val = signo(get_num(COL_TOTAL), es_nc)
+
+
+    # ========================================================
+    # RANURAS POR ALÍCUOTA
+    # ========================================================
+
+    aliquotas = descubrir_aliquotas(df.columns)
+
+    k = len(aliquotas)
+
+    neto = np.zeros((n, k + 1))
+    iva = np.zeros((n, k + 1))
+    exng = np.zeros((n, k + 1))
+    otros = np.zeros((n, k + 1))
+
+    alicuota = np.zeros(k + 1)
+
+    for j, (aliq_val, col_neto, col_iva) in enumerate(aliquotas):
+
+        alicuota[j] = aliq_val
+        neto[:, j] = signo(get_num(col_neto), es_nc)
+        iva[:, j] = signo(get_num(col_iva), es_nc)
+
+    # Si no hay ni neto ni IVA para esa alícuota,
+    # no generar fila.
+
+    presente = np.zeros((n, k + 1), dtype=bool)
+
+    presente[:, :k] = (
+        (neto[:, :k] != 0)
+        | (iva[:, :k] != 0)
+    ) & con_concepto[:, None]
+
+    tiene_aliquotas = presente[:, :k].any(axis=1)
+
+
+    # ========================================================
+    # EXENTO / NO GRAVADO / OTROS
+    # ========================================================
+    #
+    # Si existen alícuotas,
+    # Ex/Ng y Otros se agregan a la primera fila.
+    #
+    # ========================================================
+
+    primera = presente & (np.cumsum(presente, axis=1) == 1)
+
+    exng[:, :k] = np.where(primera[:, :k], exng_val[:, None], 0.0)
+    otros[:, :k] = np.where(primera[:, :k], otros_val[:, None], 0.0)
+
+
+    # ====================================================
+    # SIN ALÍCUOTAS
+    # ====================================================
+    #
+    # Si hay Ex/Ng u Otros -> utilizar esos importes.
+    #
+    # Si no hay nada discriminado pero existe Total,
+    # mandar el Total completo a Ex/Ng.
+    #
+    # ====================================================
+
+    discriminado = (exng_val != 0) | (otros_val != 0)
+
+    presente[:, k] = (
+        con_concepto
+        & ~tiene_aliquotas
+        & (discriminado | (total_val != 0))
+    )
+
+    primera[:, k] = presente[:, k]
+
+    exng[:, k] = np.where(discriminado, exng_val, total_val)
+    otros[:, k] = np.where(discriminado, otros_val, 0.0)
+
+
+    # ========================================================
+    # AJUSTE ESPECIAL DE TOTAL
+    # 6  - FACTURA B
+    # 7  - NOTA DE DÉBITO B
+    # 81 - TIQUE FACTURA A
+    # 82 - TIQUE FACTURA B
+    # ========================================================
+    #
+    # Si la suma discriminada no coincide con el total
+    # original de ARCA, enviar la diferencia a Ex/Ng.
+    #
+    # IMPORTANTE:
+    # Este ajuste automático se aplica SOLAMENTE a los
+    # códigos 6, 7, 81 y 82. El resto de los comprobantes mantiene
+    # su tratamiento habitual sin correcciones automáticas.
+    #
+    # Cuando se aplica una corrección, se marca el comprobante
+    # con la leyenda "AJUSTADO POR IA - CORROBORAR".
+    # ========================================================
+
+    total_calculado = np.zeros(n)
+
+    for j in range(k + 1):
+
+        total_calculado = total_calculado + np.where(
+            presente[:, j],
+            neto[:, j] + iva[:, j] + exng[:, j] + otros[:, j],
+            0.0,
+        )
+
+    diferencia = np.round(
+        total_val - total_calculado,
+        2,
+    )
+
+    ajustar = (
+        ajustable
+        & presente.any(axis=1)
+        & (np.abs(diferencia) >= 0.01)
+    )
+
+    exng += np.where(
+        primera & ajustar[:, None],
+        diferencia[:, None],
+        0.0,
+    )
+
+    control = agregar_control(
+        df[COL_CONTROL_IA].to_numpy(dtype=object),
+        ajustar,
+        CONTROL_AJUSTADO,
+    )
+
+
+    # ========================================================
+    # DE ANCHO A LARGO
+    # ========================================================
+    #
+    # Una fila de salida por ranura con importes, en el orden
+    # del archivo y, dentro de cada comprobante, por alícuota.
+    #
+    # ========================================================
+
+    filas, ranuras = np.nonzero(presente)
+
+    if len(filas) == 0:
+        return pd.DataFrame(columns=cols_salida + conciliacion.COLS_INTERNAS)
+
+    neto = neto[filas, ranuras]
+    iva = iva[filas, ranuras]
+    exng = exng[filas, ranuras]
+    otros = otros[filas, ranuras]
+
+    salida = pd.DataFrame({
+
+        "Fecha Emisión":
+            columna_filas(df, COL_FECHA, filas),
+
+        "Fecha Recepción":
+            columna_filas(df, COL_FECHA, filas),
+
+        "Concepto":
+            concepto[filas],
+
+        "Tipo":
+            tipo[filas],
+
+        "Letra":
+            letra[filas],
+
+        "Punto de Venta":
+            columna_filas(df, COL_PV, filas),
+
+        "Número Desde":
+            columna_filas(df, COL_NRO_DESDE, filas),
+
+        "Número Hasta":
+            columna_filas(df, COL_NRO_HASTA, filas),
+
+        "Cód. Autorización":
+            columna_filas(df, COL_COD_AUT, filas),
+
+        "Tipo Doc. Emisor":
+            columna_filas(df, COL_TIPO_DOC, filas),
+
+        "Nro. Doc. Emisor":
+            columna_filas(df, COL_CUIT_EMISOR, filas),
+
+        "Denominación Emisor":
+            columna_filas(df, COL_NOM_EMISOR, filas),
+
+        "Condición Fiscal":
+            np.where(letra[filas] == "A", "RI", "MT"),
+
+        "Tipo Cambio":
+            tc[filas],
+
+        "Moneda":
+            moneda[filas],
+
+        "Alicuota":
+            alicuota[ranuras],
+
+        "Neto":
+            neto,
+
+        "IVA":
+            iva,
+
+        "Ex/Ng":
+            exng,
+
+        "Otros Conceptos":
+            otros,
+
+        "Total":
+            neto + iva + exng + otros,
+
+        "Control IA":
+            control[filas],
+
+        # Columnas internas para la hoja de control
+
+        conciliacion.COL_TOTAL_ARCA:
+            np.where(primera[filas, ranuras], total_val[filas], 0.0),
+
+        conciliacion.COL_PRIMERA:
+            primera[filas, ranuras],
+
+        conciliacion.COL_AJUSTADO:
+            ajustar[filas],
+
+        conciliacion.COL_USD:
+            (factor != 1.0)[filas],
+
+        conciliacion.COL_NC:
+            es_nc[filas],
+
+        conciliacion.COL_DOC_INVALIDO:
+            df[COL_CONTROL_IA].to_numpy(dtype=object)[filas]
+            == CONTROL_DOC_INVALIDO,
+    })
+
+    return aplicar_padron(
+        salida[cols_salida + conciliacion.COLS_INTERNAS]
+    )
+
+
+# ============================================================
+# CONDICIÓN FISCAL SEGÚN PADRÓN
+# ============================================================
+
+def aplicar_padron(salida: pd.DataFrame) -> pd.DataFrame:
+    """
+    Completa Condición Fiscal (y opcionalmente Denominación Emisor)
+    con el padrón local de contribuyentes.
+
+    Los emisores que no están en el padrón conservan la condición
+    deducida de la letra.
+    """
+
+    if salida.empty:
+        return salida
+
+    resultado = padron.buscar(
+        cuit.documentos_a_enteros(
+            salida["Nro. Doc. Emisor"]
+        )
+    )
+
+    if resultado is None:
+        return salida
+
+    condicion, denominacion = resultado
+
+    encontrado = condicion != ""
+
+    salida.loc[encontrado, "Condición Fiscal"] = condicion[encontrado]
+
+    if PADRON_DENOMINACION:
+
+        con_nombre = pd.notna(denominacion)
+
+        salida.loc[con_nombre, "Denominación Emisor"] = (
+            denominacion[con_nombre]
+        )
+
+    return salida
+
+
+# ============================================================
+# GENERAR EXCEL PARA DESCARGAR
+# ============================================================
+
+def generar_excel(salida: pd.DataFrame) -> bytes:
+    """
+    Genera el Excel de salida con los formatos de Holistor
+    y la hoja de control de totales.
+    """
+
+    buffer = BytesIO()
+
+    with pd.ExcelWriter(
+        buffer,
+        engine="xlsxwriter",
+    ) as writer:
+
+        salida[cols_salida].to_excel(
+            writer,
+            sheet_name="Salida",
+            index=False,
+        )
+
+
+        workbook = writer.book
+
+        worksheet = writer.sheets["Salida"]
+
+
+        # ========================================================
+        # FORMATOS
+        # ========================================================
+
+        money_format = workbook.add_format(
+            {
+                "num_format": "#,##0.00"
+            }
+        )
+
+
+        col_idx = {
+            name: i
+            for i, name in enumerate(
+                cols_salida
+            )
+        }
+
+
+        # ========================================================
+        # IMPORTES
+        # ========================================================
+
+        for nombre in [
+
+            "Neto",
+
+            "IVA",
+
+            "Ex/Ng",
+
+            "Otros Conceptos",
+
+            "Total",
+
+        ]:
+
+            j = col_idx[nombre]
+
+            worksheet.set_column(
+                j,
+                j,
+                15,
+                money_format,
+            )
+
+
+        # ========================================================
+        # TIPO DE CAMBIO
+        # ========================================================
+
+        if "Tipo Cambio" in col_idx:
+
+            j = col_idx[
+                "Tipo Cambio"
+            ]
+
+            worksheet.set_column(
+                j,
+                j,
+                12,
+                money_format,
+            )
+
+
+        # ========================================================
+        # MONEDA
+        # ========================================================
+
+        if "Moneda" in col_idx:
+
+            j = col_idx[
+                "Moneda"
+            ]
+
+            worksheet.set_column(
+                j,
+                j,
+                10,
+            )
+
+
+        # ========================================================
+        # CÓDIGO DE AUTORIZACIÓN / CONTROL IA
+        # ========================================================
+
+        if "Cód. Autorización" in col_idx:
+            j = col_idx["Cód. Autorización"]
+            worksheet.set_column(j, j, 20)
+
+        if "Control IA" in col_idx:
+            j = col_idx["Control IA"]
+            worksheet.set_column(j, j, 32)
+
+
+        # ========================================================
+        # ALÍCUOTA
+        # ========================================================
+
+        aliq_format = workbook.add_format(
+            {
+                "num_format": "00.000"
+            }
+        )
+
+
+        j_aliq = col_idx[
+            "Alicuota"
+        ]
+
+        worksheet.set_column(
+            j_aliq,
+            j_aliq,
+            8,
+            aliq_format,
+        )
+
+
+        # ========================================================
+        # HOJA DE CONTROL DE TOTALES
+        # ========================================================
+
+        if set(conciliacion.COLS_INTERNAS) <= set(salida.columns):
+
+            conciliacion.escribir_hoja(
+                writer,
+                salida,
+            )
+
+    return buffer.getvalue()
+
+
+# ============================================================
+# MODO DE EJECUCIÓN
+# ============================================================
+
+MODO_MEMORIA = "memoria"
+MODO_BLOQUES = "bloques"
+MODO_PARALELO = "paralelo"
+
+MODOS = [
+    MODO_MEMORIA,
+    MODO_BLOQUES,
+    MODO_PARALELO,
+]
+
+# Memoria por celda de ARCA durante la lectura, la conversión y
+# la generación del Excel completas. `prueba_carga.py --perfil` la
+# mide: entre 200 y 230 bytes en los libros sintéticos.
+
+BYTES_POR_CELDA = 200
+
+
+def planificar(contenido: bytes, hoja=None) -> dict:
+    """
+    Elige el modo de ejecución de la hoja a partir de los metadatos
+    del Excel (ver configuracion.py), sin leer las filas.
+
+    Devuelve {"modo", "filas", "columnas", "memoria_mb", "fuente"}.
+    """
+
+    estimacion = libro_excel.estimar(contenido, hoja) or {
+        "filas": 0,
+        "columnas": 0,
+        "fuente": "desconocida",
+    }
+
+    memoria_mb = (
+        estimacion["filas"]
+        * estimacion["columnas"]
+        * BYTES_POR_CELDA
+        / 2**20
+    )
+
+    if MODO_FORZADO in MODOS:
+        modo = MODO_FORZADO
+
+    elif estimacion["filas"] <= MODO_MEMORIA_FILAS:
+        modo = MODO_MEMORIA
+
+    elif memoria_mb > MODO_BLOQUES_MB:
+        modo = MODO_BLOQUES
+
+    else:
+        modo = MODO_PARALELO
+
+    return {
+        "modo": modo,
+        "filas": estimacion["filas"],
+        "columnas": estimacion["columnas"],
+        "memoria_mb": round(memoria_mb, 1),
+        "fuente": estimacion["fuente"],
+    }
+
+
+def planificar_libro(contenido: bytes, hojas) -> list:
+    """
+    planificar() de cada hoja, con el modo memoria decidido por el
+    libro entero: solo si todas las hojas juntas no superan
+    MODO_MEMORIA_FILAS (convertirlas una tras otra en el proceso de
+    Streamlit es barato). Si no, todas van al pool, en paralelo.
+    """
+
+    planes = [planificar(contenido, hoja) for hoja in hojas]
+
+    filas_libro = sum(plan["filas"] for plan in planes)
+
+    if MODO_FORZADO not in MODOS and filas_libro > MODO_MEMORIA_FILAS:
+
+        for plan in planes:
+            if plan["modo"] == MODO_MEMORIA:
+                plan["modo"] = MODO_PARALELO
+
+    return planes
+
+
+def convertir_por_bloques(contenido: bytes, hoja, medidas: dict, al_avanzar=None):
+    """
+    Lee y convierte la hoja de a bloques de BLOQUE_FILAS filas.
+    Devuelve (salida, filas_entrada). No usa la caché de Parquet:
+    guardar la entrada exigiría tenerla entera en memoria.
+
+    Después de cada bloque llama a al_avanzar("lectura", filas leídas).
+    """
+
+    bloques = leer_excel_arca_bloques(
+        contenido,
+        0 if hoja is None else hoja,
+    )
+
+    partes = []
+    filas_entrada = 0
+
+    while True:
+
+        with metricas.cronometro(medidas, "lectura"):
+            df = next(bloques, None)
+
+        if df is None:
+            break
+
+        filas_entrada += len(df)
+
+        with metricas.cronometro(medidas, "conversion"):
+            partes.append(convertir(df))
+
+        del df
+
+        if al_avanzar is not None:
+            al_avanzar("lectura", filas_entrada)
+
+    con_filas = [p for p in partes if not p.empty]
+
+    if not con_filas:
+        return convertir(pd.DataFrame()), filas_entrada
+
+    return pd.concat(con_filas, ignore_index=True), filas_entrada
+
+
+# ============================================================
+# VISTA PREVIA
+# ============================================================
+
+FILAS_VISTA_PREVIA = 50
+
+
+def vista_previa(contenido: bytes, hoja=None, filas=FILAS_VISTA_PREVIA) -> pd.DataFrame:
+    """
+    Convierte solo las primeras `filas` filas de salida de la hoja,
+    para mostrarlas mientras el archivo completo se procesa.
+
+    Lee en streaming de a `filas` filas de ARCA (las que no tienen
+    importes no generan salida) hasta juntar las necesarias, y deja
+    de leer ahí: tarda lo mismo con 100 filas que con 100.000. Las
+    filas coinciden con las primeras de la salida completa.
+    """
+
+    bloques = leer_excel_arca_bloques(
+        contenido,
+        0 if hoja is None else hoja,
+        filas,
+    )
+
+    partes = []
+    filas_salida = 0
+
+    try:
+
+        for df in bloques:
+
+            parte = convertir(df)
+
+            if not parte.empty:
+                partes.append(parte)
+                filas_salida += len(parte)
+
+            if filas_salida >= filas:
+                break
+
+    finally:
+        bloques.close()
+
+    if not partes:
+        return convertir(pd.DataFrame())
+
+    return pd.concat(partes, ignore_index=True).head(filas)
+
+
+# ============================================================
+# CONVERSIÓN COMPLETA
+# ============================================================
+
+def _sin_avance(etapa: str, filas: int):
+    pass
+
+
+def procesar_archivo(contenido: bytes, hoja=None, plan=None, al_avanzar=None):
+    """
+    Lee, convierte y genera el Excel de salida de una hoja
+    (por defecto, la primera).
+
+    Devuelve (salida, excel_bytes, medidas). Es la unidad de trabajo
+    que se envía a los procesos del pool; `medidas` lleva los tiempos
+    por etapa y los conteos para las métricas. En libros con varias
+    hojas de ARCA se envía una por hoja.
+
+    `plan` es el de planificar(); si no se pasa, se calcula acá.
+
+    al_avanzar(etapa, filas_entrada), si se pasa, se llama al empezar
+    cada etapa (y en modo bloques, después de cada bloque leído) para
+    informar el avance.
+    """
+
+    plan = plan or planificar(contenido, hoja)
+
+    al_avanzar = al_avanzar or _sin_avance
+
+    medidas = {
+        "bytes_entrada": len(contenido),
+        "hoja": hoja,
+        "modo": plan["modo"],
+    }
+
+    if plan["modo"] == MODO_BLOQUES:
+
+        al_avanzar("lectura", 0)
+
+        salida, filas_entrada = convertir_por_bloques(
+            contenido,
+            hoja,
+            medidas,
+            al_avanzar,
+        )
+
+    else:
+
+        al_avanzar("lectura", 0)
+
+        with metricas.cronometro(medidas, "lectura"):
+            df = leer_entrada(contenido, hoja)
+
+        al_avanzar("conversion", len(df))
+
+        with metricas.cronometro(medidas, "conversion"):
+            salida = convertir(df)
+
+        filas_entrada = len(df)
+
+        del df
+
+    medidas["filas_entrada"] = filas_entrada
+    medidas["filas_salida"] = len(salida)
+    medidas["filas_ajustadas"] = int(
+        salida["Control IA"]
+        .astype(str)
+        .str.contains(CONTROL_AJUSTADO, regex=False)
+        .sum()
+    )
+
+    if salida.empty:
+
+        medidas["resultado"] = "sin_comprobantes"
+        medidas["memoria_pico"] = metricas.memoria_pico()
+
+        return salida, b"", medidas
+
+    al_avanzar("excel", filas_entrada)
+
+    with metricas.cronometro(medidas, "excel"):
+        excel_bytes = generar_excel(salida)
+
+    medidas["memoria_pico"] = metricas.memoria_pico()
+
+    return salida, excel_bytes, medidas
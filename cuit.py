@@ -0,0 +1,207 @@
+# cuit.py
+# Normalización y validación vectorizada de documentos (CUIT / DNI)
+# AIE San Justo
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# TIPOS DE DOCUMENTO (TABLA ARCA)
+# ============================================================
+
+TIPO_DOC_CUIT = 80
+TIPO_DOC_CUIL = 86
+TIPO_DOC_DNI = 96
+
+
+# Pesos del dígito verificador (módulo 11)
+
+PESOS_CUIT = np.array(
+    [5, 4, 3, 2, 7, 6, 5, 4, 3, 2],
+    dtype=np.int64,
+)
+
+
+# ============================================================
+# FUNCIONES
+# ============================================================
+
+def documentos_a_enteros(serie: pd.Series) -> np.ndarray:
+    """
+    Convierte la columna de documentos a enteros, venga como
+    número, float o texto con guiones.
+
+    Vacíos / sin dígitos -> -1.
+    """
+
+    # Convertir cada valor distinto una sola vez.
+
+    codigos, unicos = pd.factorize(serie)
+
+    unicos = pd.Series(unicos, dtype=object)
+
+    numeros = pd.to_numeric(unicos, errors="coerce")
+
+    # Textos con guiones / espacios: quedarse con los dígitos.
+
+    faltan = numeros.isna()
+
+    if faltan.any():
+        numeros[faltan] = pd.to_numeric(
+            unicos[faltan].astype(str).str.replace(
+                r"\D",
+                "",
+                regex=True,
+            ),
+            errors="coerce",
+        )
+
+    numeros = np.append(
+        numeros.fillna(-1).astype(np.int64).to_numpy(),
+        -1,
+    )
+
+    # Código -1 (vacío) toma el último elemento: -1.
+
+    return numeros[codigos]
+
+
+def cuit_valido(numeros: np.ndarray) -> np.ndarray:
+    """
+    Verifica el dígito verificador (módulo 11) de cada CUIT.
+    """
+
+    numeros = np.asarray(numeros, dtype=np.int64)
+
+    # Dígitos 1..11 de cada número (columna 0 = primer dígito).
+
+    potencias = 10 ** np.arange(10, -1, -1, dtype=np.int64)
+    digitos = (numeros[:, None] // potencias) % 10
+
+    resto = (digitos[:, :10] @ PESOS_CUIT) % 11
+    verificador = np.where(resto == 0, 0, 11 - resto)
+
+    return (
+        (numeros >= 10**10)
+        & (numeros < 10**11)
+        & (verificador != 10)
+        & (verificador == digitos[:, 10])
+    )
+
+
+def normalizar_documentos(documentos: pd.Series, tipos=None):
+    """
+    Normaliza la columna de documentos del emisor.
+
+    Devuelve (numeros, tipo_doc, valido):
+
+    - numeros: todo número de 11 dígitos como texto de 11 dígitos
+      (tenga o no el dígito verificador correcto), DNI como texto
+      sin ceros a la izquierda, o el valor original como texto si
+      no se reconoce.
+    - tipo_doc: 80 CUIT / 86 CUIL / 96 DNI.
+    - valido: False si el documento no es un CUIT/CUIL con dígito
+      verificador correcto ni un DNI.
+
+    `tipos` es la columna "Tipo Doc. Emisor" del archivo de ARCA,
+    si existe (solo se usa para distinguir CUIL de CUIT).
+    """
+
+    # Los emisores se repiten mucho: trabajar sobre los valores
+    # distintos y expandir al final.
+
+    codigos, unicos = pd.factorize(documentos)
+
+    unicos = pd.Series(unicos, dtype=object)
+
+    numeros = documentos_a_enteros(unicos)
+
+    es_cuit = cuit_valido(numeros)
+
+    # 11 dígitos aunque el verificador no cierre: se normalizan igual
+    # y quedan marcados solo por `valido`. Un texto con ceros a la
+    # izquierda ("0201...") también cuenta como de 11 dígitos.
+
+    largo_texto = (
+        unicos.astype(str)
+        .str.replace(r"\D", "", regex=True)
+        .str.len()
+        .to_numpy()
+    )
+
+    once_digitos = (
+        (numeros >= 0)
+        & (numeros < 10**11)
+        & ((numeros >= 10**10) | (largo_texto == 11))
+    )
+
+    es_dni = (
+        ~once_digitos
+        & (numeros >= 10**6)
+        & (numeros < 10**8)
+    )
+
+    # Los no reconocidos quedan como texto también, para que la
+    # columna tenga un solo tipo.
+
+    normalizados = unicos.astype(str)
+    texto = numeros.astype(str)
+
+    normalizados[es_dni] = texto[es_dni]
+    normalizados[once_digitos] = (
+        pd.Series(texto[once_digitos], dtype=object).str.zfill(11).to_numpy()
+    )
+
+
+    # Expandir a todas las filas (código -1 = vacío).
+
+    vacio = codigos < 0
+    codigos = np.where(vacio, 0, codigos)
+
+    if len(unicos) == 0:
+        normalizados = pd.Series([None], dtype=object)
+        es_cuit = es_dni = np.zeros(1, dtype=bool)
+
+    es_cuit = es_cuit[codigos] & ~vacio
+    es_dni = es_dni[codigos] & ~vacio
+
+    numeros_filas = pd.Series(
+        normalizados.to_numpy()[codigos],
+        index=documentos.index,
+        dtype=object,
+    )
+
+    numeros_filas[vacio] = documentos[vacio]
+
+
+    # ========================================================
+    # TIPO DE DOCUMENTO
+    # ========================================================
+
+    es_cuil = np.zeros(len(documentos), dtype=bool)
+
+    if tipos is not None:
+
+        cod_tipos, tipos_unicos = pd.factorize(tipos)
+
+        tipos_unicos = pd.Series(tipos_unicos, dtype=object)
+        tipos_unicos = tipos_unicos.astype(str).str.upper().str.strip()
+
+        cuil_unicos = np.append(
+            (
+                tipos_unicos.str.contains("CUIL")
+                | (tipos_unicos == str(TIPO_DOC_CUIL))
+            ).to_numpy(),
+            False,
+        )
+
+        es_cuil = cuil_unicos[cod_tipos] & es_cuit
+
+    tipo_doc = np.select(
+        [es_cuil, es_dni],
+        [TIPO_DOC_CUIL, TIPO_DOC_DNI],
+        default=TIPO_DOC_CUIT,
+    )
+
+    return numeros_filas, tipo_doc, es_cuit | es_dni
@@ -0,0 +1,214 @@
+# filtros.py
+# Índices precalculados para filtrar la salida sin reconvertir
+# AIE San Justo
+#
+# Para cada columna filtrable se guarda, una sola vez por archivo,
+# la lista de posiciones de fila de cada valor. Filtrar es unir las
+# posiciones de los valores elegidos y cruzar entre columnas; el
+# rango de fechas se resuelve con searchsorted sobre las fechas
+# ordenadas.
+#
+# Control IA puede traer varias leyendas en la misma celda: se indexa
+# por leyenda, así que elegir una encuentra también las filas que
+# además tienen otras.
+
+import numpy as np
+import pandas as pd
+
+from conversor import SEPARADOR_CONTROL, a_fechas
+
+
+COLUMNAS_FILTRO = [
+    "Tipo",
+    "Letra",
+    "Alicuota",
+    "Control IA",
+    "Nro. Doc. Emisor",
+]
+
+# Columnas con varios valores por celda y su separador.
+
+COLUMNAS_LEYENDAS = {
+    "Control IA": SEPARADOR_CONTROL,
+}
+
+COL_FECHA = "Fecha Emisión"
+COL_NOMBRE = "Denominación Emisor"
+
+# Columnas que necesita el índice (alcanza con leer solo estas).
+
+COLUMNAS_INDICE = COLUMNAS_FILTRO + [COL_FECHA, COL_NOMBRE]
+
+
+# ============================================================
+# ÍNDICE DE LA SALIDA
+# ============================================================
+
+def _clave_numerica(valor) -> float:
+    """
+    Orden de un valor numérico; el vacío va primero.
+    """
+
+    return -np.inf if isinstance(valor, str) else float(valor)
+
+
+class IndiceSalida:
+    """
+    Índices por valor sobre las columnas filtrables de la salida.
+    """
+
+    def __init__(self, salida: pd.DataFrame):
+
+        self.salida = salida.reset_index(drop=True)
+
+        self.posiciones = {}
+
+        for col in COLUMNAS_FILTRO:
+
+            if col not in self.salida.columns:
+                continue
+
+            valores = self.salida[col].fillna("")
+
+            if col in COLUMNAS_LEYENDAS:
+                valores = (
+                    valores.astype(str)
+                    .str.split(COLUMNAS_LEYENDAS[col], regex=False)
+                    .explode()
+                )
+
+            # Fila de la salida de cada valor (con varias leyendas
+            # por celda, una fila aparece varias veces).
+
+            filas = valores.index.to_numpy()
+
+            grupos = valores.groupby(
+                valores.to_numpy(),
+                sort=False,
+            ).indices
+
+            # Columnas numéricas (Alicuota) por valor: 2.5 antes que
+            # 10.5. Texto o tipos mezclados, como texto.
+
+            numerica = all(
+                valor == "" or isinstance(valor, (int, float, np.number))
+                for valor in grupos
+            )
+
+            self.posiciones[col] = {
+                valor: filas[grupos[valor]]
+                for valor in sorted(
+                    grupos,
+                    key=_clave_numerica if numerica else str,
+                )
+            }
+
+
+        # Fechas ordenadas para rangos.
+
+        fechas = a_fechas(self.salida[COL_FECHA]).to_numpy()
+
+        self.orden_fechas = np.argsort(fechas, kind="stable")
+        self.fechas_ordenadas = fechas[self.orden_fechas]
+
+
+        # Nombre de cada emisor para mostrar en los filtros.
+
+        self.nombres_emisor = (
+            self.salida
+            .drop_duplicates("Nro. Doc. Emisor")
+            .set_index("Nro. Doc. Emisor")[COL_NOMBRE]
+            .to_dict()
+        )
+
+
+    def valores(self, col: str) -> list:
+        """
+        Valores distintos de la columna (para los selectores).
+        """
+
+        return list(self.posiciones.get(col, {}))
+
+
+    def rango_fechas(self):
+        """
+        (mínima, máxima) fecha de emisión o None si no hay fechas.
+        """
+
+        validas = self.fechas_ordenadas[
+            ~pd.isna(self.fechas_ordenadas)
+        ]
+
+        if len(validas) == 0:
+            return None
+
+        return (
+            pd.Timestamp(validas[0]).date(),
+            pd.Timestamp(validas[-1]).date(),
+        )
+
+
+    def filtrar(self, seleccion: dict, desde=None, hasta=None) -> pd.DataFrame:
+        """
+        Devuelve las filas que cumplen todos los filtros.
+
+        seleccion: {columna: [valores]}. Una lista vacía no filtra.
+        desde / hasta: fechas inclusivas (o None).
+        """
+
+        return self.salida.iloc[
+            self.posiciones_filtradas(seleccion, desde, hasta)
+        ]
+
+
+    def posiciones_filtradas(self, seleccion: dict, desde=None, hasta=None):
+        """
+        Como filtrar, pero devuelve las posiciones de las filas
+        (para tomarlas de otra tabla con las mismas filas).
+        """
+
+        mascara = np.ones(len(self.salida), dtype=bool)
+
+        for col, elegidos in seleccion.items():
+
+            if not elegidos:
+                continue
+
+            indice = self.posiciones[col]
+
+            filas = np.zeros(len(self.salida), dtype=bool)
+
+            for valor in elegidos:
+                filas[indice.get(valor, [])] = True
+
+            mascara &= filas
+
+
+        if desde is not None or hasta is not None:
+
+            inicio = 0
+            fin = len(self.fechas_ordenadas)
+
+            if desde is not None:
+                inicio = np.searchsorted(
+                    self.fechas_ordenadas,
+                    np.datetime64(pd.Timestamp(desde)),
+                    side="left",
+                )
+
+            if hasta is not None:
+                fin = np.searchsorted(
+                    self.fechas_ordenadas,
+                    np.datetime64(
+                        pd.Timestamp(hasta) + pd.Timedelta(days=1)
+                    ),
+                    side="left",
+                )
+
+            filas = np.zeros(len(self.salida), dtype=bool)
+            filas[self.orden_fechas[inicio:fin]] = True
+
+            mascara &= filas
+
+
+        return np.flatnonzero(mascara)
@@ -0,0 +1,384 @@
+# historico.py
+# Histórico acumulado por cliente en Parquet particionado
+# AIE San Justo
+#
+# Cada conversión se puede agregar al histórico del cliente, guardado
+# como un dataset particionado por cliente / año / mes:
+#
+#   HISTORICO_DIR/cliente=<cliente>/anio=<aaaa>/mes=<mm>/datos.parquet
+#
+# Agregar un mes solo lee y reescribe su propia partición. El Excel
+# acumulado del año lee únicamente las particiones del período pedido.
+
+import os
+import re
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+
+except ImportError:  # Windows
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+import conciliacion
+import conversor
+import metricas
+from configuracion import HISTORICO_DIR
+
+
+ARCHIVO = "datos.parquet"
+ARCHIVO_BLOQUEO = ".lock"
+
+# Columnas que se guardan: la salida de Holistor más las internas
+# de la hoja de control.
+
+COLUMNAS = conversor.cols_salida + conciliacion.COLS_INTERNAS
+
+# Identifican un comprobante: si se vuelve a agregar, sus filas
+# reemplazan a las anteriores.
+
+COLUMNAS_CLAVE = conciliacion.COLUMNAS_COMPROBANTE
+
+COL_FECHA = "Fecha Emisión"
+COL_FECHA_ALT = "Fecha Recepción"
+
+# Columnas que se copian tal cual del archivo de ARCA: según cómo se
+# leyó pueden mezclar tipos (fechas y texto, números y texto), y
+# Parquet necesita un solo tipo por columna.
+
+COLUMNAS_FECHA = [COL_FECHA, COL_FECHA_ALT]
+
+COLUMNAS_ENTERO = [
+    "Punto de Venta",
+    "Número Desde",
+    "Número Hasta",
+]
+
+COLUMNAS_TEXTO = [
+    "Cód. Autorización",
+    "Tipo Doc. Emisor",
+    "Nro. Doc. Emisor",
+    "Denominación Emisor",
+]
+
+
+# ============================================================
+# RUTAS
+# ============================================================
+
+def nombre_cliente(cliente: str) -> str:
+    """
+    Nombre del cliente apto para usar como carpeta
+    (letras, dígitos, guiones y guiones bajos).
+    """
+
+    return re.sub(r"[^\w-]+", "_", str(cliente).strip()).strip("_")
+
+
+def _carpeta_cliente(cliente: str):
+
+    return HISTORICO_DIR / f"cliente={nombre_cliente(cliente)}"
+
+
+def _ruta_particion(cliente: str, anio: int, mes: int):
+
+    return (
+        _carpeta_cliente(cliente)
+        / f"anio={anio:04d}"
+        / f"mes={mes:02d}"
+        / ARCHIVO
+    )
+
+
+def _numero_de(carpeta) -> int:
+
+    try:
+        return int(carpeta.name.split("=", 1)[1])
+
+    except (IndexError, ValueError):
+        return -1
+
+
+# ============================================================
+# CONSULTAS (SIN LEER DATOS)
+# ============================================================
+
+def periodos(cliente: str) -> list:
+    """
+    Períodos (año, mes) guardados para el cliente, en orden.
+    Solo recorre las carpetas: no abre ningún Parquet.
+    """
+
+    encontrados = []
+
+    for ruta in _carpeta_cliente(cliente).glob(f"anio=*/mes=*/{ARCHIVO}"):
+
+        anio = _numero_de(ruta.parent.parent)
+        mes = _numero_de(ruta.parent)
+
+        if anio >= 0 and 1 <= mes <= 12:
+            encontrados.append((anio, mes))
+
+    return sorted(encontrados)
+
+
+def firma(cliente: str, anio: int, hasta_mes: int = 12) -> tuple:
+    """
+    Fechas de modificación de las particiones del período.
+    Cambia cada vez que se agrega un mes: sirve para saber si un
+    Excel acumulado ya generado sigue vigente.
+    """
+
+    resultado = []
+
+    for mes in range(1, hasta_mes + 1):
+
+        try:
+            resultado.append(
+                (mes, _ruta_particion(cliente, anio, mes).stat().st_mtime_ns)
+            )
+
+        except OSError:
+            continue
+
+    return tuple(resultado)
+
+
+# ============================================================
+# TIPOS DE LAS COLUMNAS
+# ============================================================
+
+def _texto_celda(valor):
+    """
+    Un valor como texto: los números enteros sin ".0"
+    y los vacíos como nulos.
+    """
+
+    if valor is None or valor is pd.NA:
+        return None
+
+    if isinstance(valor, float):
+
+        if np.isnan(valor):
+            return None
+
+        if valor.is_integer():
+            return str(int(valor))
+
+    return str(valor).strip()
+
+
+def _normalizar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lleva cada columna a un tipo fijo antes de escribir la
+    partición: fechas, enteros con nulos (Int64) o texto.
+    Así las particiones y sus claves coinciden aunque los archivos
+    de ARCA se hayan leído de formas distintas.
+    """
+
+    df = df.copy()
+
+    for col in COLUMNAS_FECHA:
+        df[col] = conversor.a_fechas(df[col])
+
+    for col in COLUMNAS_ENTERO:
+        df[col] = (
+            pd.to_numeric(df[col], errors="coerce")
+            .round()
+            .astype("Int64")
+        )
+
+    for col in COLUMNAS_TEXTO:
+        df[col] = df[col].map(_texto_celda).astype("string")
+
+    return df
+
+
+# ============================================================
+# AGREGAR UNA CONVERSIÓN
+# ============================================================
+
+@contextmanager
+def _bloqueo(ruta):
+    """
+    Bloqueo exclusivo de la partición mientras se lee, se combina y
+    se reescribe: dos sesiones que agregan el mismo cliente y mes a
+    la vez no pierden filas. Usa un archivo .lock al lado del
+    Parquet (sin fcntl, en Windows, no bloquea).
+    """
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    if fcntl is None:
+        yield
+        return
+
+    with open(ruta.with_name(ARCHIVO_BLOQUEO), "a") as bloqueo:
+
+        fcntl.flock(bloqueo, fcntl.LOCK_EX)
+
+        try:
+            yield
+
+        finally:
+            fcntl.flock(bloqueo, fcntl.LOCK_UN)
+
+
+def _escribir(ruta, df: pd.DataFrame):
+    """
+    Escribe la partición en un temporal y la renombra: quien lea el
+    histórico al mismo tiempo nunca ve un archivo a medio escribir.
+    """
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = ruta.with_name(f".{uuid.uuid4().hex}.tmp")
+
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, ruta)
+
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def agregar(salida: pd.DataFrame, cliente: str):
+    """
+    Agrega la salida convertida al histórico del cliente.
+
+    Las filas se reparten por año / mes de emisión (o de recepción,
+    si falta). Cada partición afectada se lee, se reemplazan los
+    comprobantes que vuelven a venir y se reescribe; las demás
+    particiones no se tocan.
+
+    Devuelve (agregado, medidas). `agregado` lleva, por período,
+    las filas agregadas y el total de la partición.
+    """
+
+    if not nombre_cliente(cliente):
+        raise ValueError("Falta el nombre del cliente.")
+
+    medidas = {}
+
+    fechas = conversor.a_fechas(salida[COL_FECHA]).fillna(
+        conversor.a_fechas(salida[COL_FECHA_ALT])
+    )
+
+    con_fecha = fechas.notna().to_numpy()
+
+    agregado = {
+        "periodos": [],
+        "sin_fecha": int((~con_fecha).sum()),
+    }
+
+    salida = _normalizar_tipos(salida.loc[con_fecha, COLUMNAS])
+    fechas = fechas[con_fecha]
+
+    with metricas.cronometro(medidas, "escritura"):
+
+        grupos = salida.groupby(
+            [fechas.dt.year.to_numpy(), fechas.dt.month.to_numpy()],
+            sort=True,
+        )
+
+        for (anio, mes), nuevas in grupos:
+
+            anio, mes = int(anio), int(mes)
+
+            ruta = _ruta_particion(cliente, anio, mes)
+
+            with _bloqueo(ruta):
+
+                if ruta.exists():
+
+                    anteriores = _normalizar_tipos(
+                        pd.read_parquet(ruta, columns=COLUMNAS)
+                    )
+
+                    reemplazadas = np.isin(
+                        conciliacion.clave_comprobante(anteriores),
+                        conciliacion.clave_comprobante(nuevas),
+                    )
+
+                    particion = pd.concat(
+                        [anteriores[~reemplazadas], nuevas],
+                        ignore_index=True,
+                    )
+
+                else:
+                    particion = nuevas.reset_index(drop=True)
+
+                _escribir(ruta, particion)
+
+            agregado["periodos"].append(
+                (anio, mes, len(nuevas), len(particion))
+            )
+
+    return agregado, medidas
+
+
+# ============================================================
+# ACUMULADO DEL AÑO
+# ============================================================
+
+def leer_acumulado(
+    cliente: str,
+    anio: int,
+    hasta_mes: int = 12,
+    columnas=None,
+) -> pd.DataFrame:
+    """
+    Lee las particiones del cliente de enero a `hasta_mes` del año,
+    solo con las columnas pedidas (todas las guardadas si es None).
+    """
+
+    columnas = COLUMNAS if columnas is None else list(columnas)
+
+    partes = []
+
+    for mes in range(1, hasta_mes + 1):
+
+        ruta = _ruta_particion(cliente, anio, mes)
+
+        if ruta.exists():
+            partes.append(pd.read_parquet(ruta, columns=columnas))
+
+    if not partes:
+        return pd.DataFrame(columns=columnas)
+
+    return pd.concat(partes, ignore_index=True)
+
+
+def exportar_acumulado(cliente: str, anio: int, hasta_mes: int = 12):
+    """
+    Excel en formato Holistor con el acumulado del año. Lee todas
+    las columnas guardadas: la hoja de control necesita las internas.
+
+    Devuelve (excel_bytes, medidas); excel_bytes vacío si no hay
+    datos en el período.
+    """
+
+    medidas = {}
+
+    with metricas.cronometro(medidas, "lectura"):
+        acumulado = leer_acumulado(cliente, anio, hasta_mes)
+
+    medidas["filas_salida"] = len(acumulado)
+
+    if acumulado.empty:
+
+        medidas["resultado"] = "sin_comprobantes"
+
+        return b"", medidas
+
+    with metricas.cronometro(medidas, "excel"):
+        excel_bytes = conversor.generar_excel(acumulado)
+
+    medidas["memoria_pico"] = metricas.memoria_pico()
+
+    return excel_bytes, medidas
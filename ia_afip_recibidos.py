@@ -2,10 +2,36 @@
 # Conversión de ARCA "Recibidos" -> Formato Holistor
 # AIE San Justo
 
-import streamlit as st
+import re
+import time
+
 import pandas as pd
-from io import BytesIO
+import streamlit as st
 from pathlib import Path
+from streamlit.logger import get_logger
+
+import historico
+import intercambio
+import metricas
+from configuracion import (
+    MAX_COLA,
+    MAX_PROCESOS,
+    METRICAS_ARCHIVO,
+    METRICAS_INTERVALO,
+    METRICAS_PUERTO,
+)
+from comparar import comparar_archivos
+from conversor import (
+    FILAS_VISTA_PREVIA,
+    MODO_MEMORIA,
+    cols_salida,
+    hojas_arca,
+    planificar_libro,
+    vista_previa,
+)
+from filtros import COLUMNAS_INDICE, IndiceSalida
+from libro_excel import nombres_hojas
+from pool_conversion import ColaLlena, PoolConversion
 
 
 # ============================================================
@@ -17,6 +43,13 @@ HERE = Path(__file__).parent
 LOGO = HERE / "logo_aie.png"
 FAVICON = HERE / "favicon_aie.ico"
 
+MIME_XLSX = (
+    "application/vnd.openxmlformats-officedocument."
+    "spreadsheetml.sheet"
+)
+
+LOGGER = get_logger("iarecibidos")
+
 
 # ============================================================
 # CONFIGURACIÓN DE STREAMLIT
@@ -45,726 +78,800 @@ st.write(
 )
 
 
-uploaded = st.file_uploader(
-    "Subí el archivo de ARCA (.xlsx)",
-    type=["xlsx"],
+MODO_CONVERTIR = "Convertir archivo"
+MODO_COMPARAR = "Comparar dos exportaciones"
+
+modo = st.radio(
+    "Modo",
+    [MODO_CONVERTIR, MODO_COMPARAR],
+    horizontal=True,
 )
 
 
 # ============================================================
-# FUNCIONES DE COMPROBANTES
+# POOL DE CONVERSIÓN COMPARTIDO
 # ============================================================
 
-def get_codigo_arca(concepto: str) -> str:
+@st.cache_resource
+def get_pool() -> PoolConversion:
     """
-    Obtiene el código numérico del comprobante ARCA.
-
-    Ejemplos:
-    '051 - Factura M' -> '51'
-    '52 - Nota de Débito M' -> '52'
-    '063 - Liquidación A' -> '63'
+    Un único pool de procesos para todas las sesiones.
     """
-    concepto = str(concepto).strip()
 
-    if not concepto:
-        return ""
+    return PoolConversion(
+        max_procesos=MAX_PROCESOS,
+        max_cola=MAX_COLA,
+    )
+
+
+# ============================================================
+# INTERCAMBIO CON EL POOL
+# ============================================================
 
-    codigo = concepto.split("-")[0].strip()
+@st.cache_resource(
+    scope="session",
+    on_release=lambda carpeta: carpeta.liberar(),
+)
+def get_carpeta() -> intercambio.CarpetaSesion:
+    """
+    Carpeta donde el pool deja la salida de esta sesión.
+    Streamlit la libera (y se borran sus archivos) cuando la
+    sesión se desconecta.
+    """
 
-    # Quitar ceros a la izquierda.
-    # Ej: 051 -> 51
-    codigo = codigo.lstrip("0")
+    return intercambio.CarpetaSesion()
 
-    return codigo if codigo else "0"
 
+# ============================================================
+# MÉTRICAS
+# ============================================================
 
-def map_tipo_letra(concepto: str):
+@st.cache_resource
+def get_registro() -> metricas.Registro:
     """
-    Devuelve (Tipo, Letra) según el comprobante de ARCA,
-    adaptado al formato esperado por Holistor.
+    Un único registro de métricas para todas las sesiones.
+    Arranca la exposición en archivo / HTTP si está configurada.
     """
 
-    concepto = str(concepto).strip()
-    codigo = get_codigo_arca(concepto)
-
-    # --------------------------------------------------------
-    # NUEVOS COMPROBANTES
-    # --------------------------------------------------------
-
-    # 051 - Factura M
-    if codigo == "51":
-        return "F", "M"
-
-    # 052 - Nota de Débito M
-    # En Holistor todas las Notas de Débito usan Tipo D
-    # independientemente de la letra.
-    if codigo == "52":
-        return "D", "M"
-
-    # 053 - Nota de Crédito M
-    # En Holistor todas las Notas de Crédito usan Tipo C
-    # independientemente de la letra.
-    if codigo == "53":
-        return "C", "M"
-
-    # 063 - Liquidación A
-    # En Holistor se vincula con comprobante LB
-    if codigo == "63":
-        return "LB", "A"
-
-    # --------------------------------------------------------
-    # CASO ESPECIAL EXISTENTE
-    # --------------------------------------------------------
-
-    # 81 - Tique Factura A
-    if codigo == "81" and "Tique Factura A" in concepto:
-        return "T", "A"
-
-    # --------------------------------------------------------
-    # TIPOS GENERALES HOLISTOR
-    # --------------------------------------------------------
-    #
-    # IMPORTANTE:
-    # La letra NO cambia el Tipo de comprobante.
-    #
-    # Nota de Crédito = C
-    # Nota de Débito = D
-    # Factura = F
-    # Recibo = R
-    # --------------------------------------------------------
-
-    if "Nota de Crédito" in concepto:
-        tipo = "C"
-
-    elif "Nota de Débito" in concepto:
-        tipo = "D"
-
-    elif "Recibo" in concepto:
-        tipo = "R"
-
-    elif "Factura" in concepto:
-        tipo = "F"
+    registro = metricas.Registro()
 
-    else:
-        tipo = ""
+    def actualizar_gauges(registro_):
 
-    # --------------------------------------------------------
-    # LETRA
-    # --------------------------------------------------------
+        en_curso, en_espera = get_pool().estado()
 
-    # Caso especial existente:
-    # 8 - Nota de Crédito C => Holistor letra B
-    if codigo == "8":
-        letra = "B"
+        registro_.fijar(
+            "operaciones_en_curso",
+            "Operaciones ejecutándose en el pool.",
+            en_curso,
+        )
 
-    else:
-        # En general la letra es el último carácter:
-        # A / B / C / M
-        letra = concepto[-1] if concepto else ""
+        registro_.fijar(
+            "operaciones_en_cola",
+            "Operaciones esperando turno en el pool.",
+            en_espera,
+        )
 
-    return tipo, letra
+        registro_.fijar(
+            "memoria_rss_bytes",
+            "Memoria actual (RSS) del proceso de Streamlit.",
+            metricas.memoria_actual(),
+        )
 
+    metricas.iniciar_exposicion(
+        registro,
+        ruta=METRICAS_ARCHIVO,
+        intervalo=METRICAS_INTERVALO,
+        puerto=METRICAS_PUERTO,
+        al_exponer=actualizar_gauges,
+    )
 
-# ============================================================
-# DETENER SI TODAVÍA NO SE SUBIÓ ARCHIVO
-# ============================================================
+    return registro
 
-if uploaded is None:
-    st.stop()
 
+# Crear el registro al cargar la app: la exposición queda activa
+# aunque todavía no se haya convertido nada.
 
-# ============================================================
-# LECTURA DEL EXCEL DE ARCA
-# ============================================================
+get_registro()
 
-# header=1 porque la fila 2 del archivo tiene
-# los encabezados reales.
 
-df = pd.read_excel(
-    uploaded,
-    sheet_name=0,
-    header=1,
-)
+def ejecutar_en_pool(operacion: str, fn, *args):
+    """
+    Ejecuta fn(*args) en el pool mostrando la posición en la cola.
+    Si la cola está llena, avisa y detiene el script.
+    """
 
+    return mapear_en_pool(operacion, fn, [args])[0]
 
-# ============================================================
-# NOMBRES DE COLUMNAS SEGÚN ARCA
-# ============================================================
 
-COL_FECHA = "Fecha"
-COL_TIPO_AFIP = "Tipo"
+def mapear_en_pool(operacion: str, fn, lista_args):
+    """
+    Ejecuta fn(*args) para cada elemento de lista_args, en paralelo
+    en el pool, y devuelve los resultados en orden.
 
-COL_PV = "Punto de Venta"
-COL_NRO_DESDE = "Número Desde"
-COL_NRO_HASTA = "Número Hasta"
+    Registra la llamada como una sola operación en las métricas (las
+    hojas de un libro no cuentan como operaciones aparte). Si fn
+    devuelve una tupla, su último elemento son las medidas tomadas
+    en el proceso del pool.
+    """
 
-COL_CUIT_EMISOR = "Nro. Doc. Emisor"
-COL_NOM_EMISOR = "Denominación Emisor"
-COL_COD_AUT = "Cód. Autorización"
+    if not lista_args:
+        return []
 
+    aviso_cola = st.empty()
 
-# ------------------------------------------------------------
-# MONEDA / TIPO DE CAMBIO
-# ------------------------------------------------------------
+    def mostrar_posicion(posicion: int):
 
-COL_TC = "Tipo Cambio"
-COL_MON = "Moneda"
+        aviso_cola.info(
+            f"Hay otras conversiones en curso. "
+            f"Tu posición en la cola: {posicion}"
+        )
 
+    inicio = time.perf_counter()
 
-# ------------------------------------------------------------
-# IVA
-# ------------------------------------------------------------
+    try:
 
-COL_IVA_105 = "IVA 10,5%"
-COL_NETO_105 = "Neto Grav. IVA 10,5%"
+        with st.spinner("Procesando archivo..."):
 
-COL_IVA_21 = "IVA 21%"
-COL_NETO_21 = "Neto Grav. IVA 21%"
+            resultados = get_pool().mapear(
+                fn,
+                lista_args,
+                al_esperar=mostrar_posicion,
+            )
 
-COL_IVA_27 = "IVA 27%"
-COL_NETO_27 = "Neto Grav. IVA 27%"
+    except ColaLlena:
 
+        metricas.registrar_operacion(
+            get_registro(),
+            operacion,
+            "cola_llena",
+            time.perf_counter() - inicio,
+        )
 
-# Si hay monto acá, pasarlo como EXENTO en Ex/Ng
+        st.error(
+            "El servidor está ocupado con muchas conversiones. "
+            "Volvé a intentar en unos minutos."
+        )
 
-COL_NETO_0 = "Neto Grav. IVA 0%"
+        st.stop()
 
+    except Exception:
 
-# ------------------------------------------------------------
-# OTROS IMPORTES
-# ------------------------------------------------------------
+        metricas.registrar_operacion(
+            get_registro(),
+            operacion,
+            "error",
+            time.perf_counter() - inicio,
+        )
 
-COL_NETO_NG = "Neto No Gravado"
-COL_EXENTAS = "Op. Exentas"
-COL_OTROS = "Otros Tributos"
-COL_TOTAL = "Imp. Total"
+        raise
 
+    metricas.registrar_operacion(
+        get_registro(),
+        operacion,
+        "ok",
+        time.perf_counter() - inicio,
+        medidas_de(resultados),
+    )
 
-# ============================================================
-# FALLBACKS POR POSIBLES CAMBIOS DE NOMBRE EN ARCA
-# ============================================================
+    aviso_cola.empty()
 
-if COL_TC not in df.columns and "Tipo de Cambio" in df.columns:
-    COL_TC = "Tipo de Cambio"
+    return resultados
 
-if COL_MON not in df.columns and "Moneda" in df.columns:
-    COL_MON = "Moneda"
 
-if COL_NETO_0 not in df.columns and "Neto Grav. IVA 0 %" in df.columns:
-    COL_NETO_0 = "Neto Grav. IVA 0 %"
+def medidas_de(resultados) -> list:
+    """
+    Medidas de cada resultado (su último elemento, si es una tupla).
+    """
 
-# Posibles variantes del encabezado de autorización en ARCA
-if COL_COD_AUT not in df.columns:
-    for alternativa in [
-        "Cod. Autorización",
-        "Código Autorización",
-        "Código de Autorización",
-        "Cod. Autorizacion",
-        "Código Autorizacion",
-        "Código de Autorizacion",
-    ]:
-        if alternativa in df.columns:
-            COL_COD_AUT = alternativa
-            break
+    return [
+        resultado_[-1]
+        for resultado_ in resultados
+        if isinstance(resultado_, tuple)
+    ]
 
 
-# ============================================================
-# ASEGURAR COLUMNAS
-# ============================================================
+def iniciar_en_pool(operacion: str, fn, lista_args):
+    """
+    Como mapear_en_pool, pero sin esperar: devuelve la Tarea del
+    pool y el script sigue (para mostrar la vista previa y el
+    avance). Las métricas se registran cuando la tarea termina.
+    """
 
-for c in [
-    COL_TC,
-    COL_MON,
-    COL_NETO_0,
-    COL_COD_AUT,
-]:
-    if c not in df.columns:
+    # El hilo de la tarea no tiene contexto de Streamlit: el
+    # registro se obtiene acá.
 
-        if c in [COL_MON, COL_COD_AUT]:
-            df[c] = ""
+    registro = get_registro()
 
-        else:
-            df[c] = 0.0
+    def registrar(tarea):
 
+        if tarea.error is not None:
+
+            metricas.registrar_operacion(
+                registro,
+                operacion,
+                "cola_llena" if isinstance(tarea.error, ColaLlena) else "error",
+                tarea.segundos,
+            )
+
+            return
+
+        metricas.registrar_operacion(
+            registro,
+            operacion,
+            "ok",
+            tarea.segundos,
+            medidas_de(tarea.resultados),
+        )
+
+    return get_pool().mapear_en_fondo(
+        fn,
+        lista_args,
+        al_terminar=registrar,
+    )
 
-# ============================================================
-# FUNCIONES AUXILIARES
-# ============================================================
 
-def get_num_raw(row, col) -> float:
+def mapear_local(operacion: str, fn, lista_args):
     """
-    Devuelve un número limpio.
-    NaN / vacío / error -> 0
+    Ejecuta fn(*args) para cada elemento de lista_args en el proceso
+    de Streamlit, sin pasar por el pool (libros chicos: no esperan
+    turno detrás de los grandes). Registra una sola operación, igual
+    que mapear_en_pool.
     """
 
-    v = row.get(col, 0)
+    if not lista_args:
+        return []
 
-    if pd.isna(v):
-        return 0.0
+    inicio = time.perf_counter()
 
     try:
-        return float(v)
-
-    except Exception:
-        return 0.0
 
+        with st.spinner("Procesando archivo..."):
+            resultados = [fn(*args) for args in lista_args]
 
-# ============================================================
-# PROCESAMIENTO
-# ============================================================
+    except Exception:
 
-registros = []
+        metricas.registrar_operacion(
+            get_registro(),
+            operacion,
+            "error",
+            time.perf_counter() - inicio,
+            proceso="streamlit",
+        )
 
+        raise
 
-for _, row in df.iterrows():
+    metricas.registrar_operacion(
+        get_registro(),
+        operacion,
+        "ok",
+        time.perf_counter() - inicio,
+        medidas_de(resultados),
+        proceso="streamlit",
+    )
 
-    concepto = str(
-        row.get(COL_TIPO_AFIP, "")
-    ).strip()
+    return resultados
 
-    if not concepto:
-        continue
 
-    codigo_arca = get_codigo_arca(concepto)
+def clave_upload(archivo) -> str:
+    """
+    Identifica un archivo subido (para no reprocesarlo en cada
+    interacción con la página).
+    """
 
-    tipo, letra = map_tipo_letra(concepto)
+    return getattr(
+        archivo,
+        "file_id",
+        f"{archivo.name}-{archivo.size}",
+    )
 
 
-    # ========================================================
-    # NOTAS DE CRÉDITO
-    # ========================================================
-    #
-    # Todas las Notas de Crédito deben RESTAR.
-    #
-    # Incluye:
-    # - NC A
-    # - NC B
-    # - NC C
-    # - 053 Nota de Crédito M
-    #
-    # ========================================================
+def mostrar_footer():
 
-    es_nc = (
-        codigo_arca == "53"
-        or "Nota de Crédito" in concepto
+    st.markdown(
+        "© AIE – Herramienta para uso interno | "
+        "Developer Alfonso Alderete"
     )
 
 
-    # ========================================================
-    # COMPROBANTES CON CONTROL ESPECIAL DE TOTAL
-    # 6  - FACTURA B
-    # 7  - NOTA DE DÉBITO B
-    # 81 - TIQUE FACTURA A
-    # 82 - TIQUE FACTURA B
-    # ========================================================
+# ============================================================
+# MODO COMPARACIÓN
+# ============================================================
+#
+# Dos exportaciones del mismo período: se muestran los
+# comprobantes nuevos, eliminados y con importes modificados,
+# y se descargan solo los nuevos / modificados en formato
+# Holistor.
+#
+# ============================================================
 
-    es_factura_b_6 = (
-        codigo_arca == "6"
-        and "Factura B" in concepto
-    )
+if modo == MODO_COMPARAR:
 
-    es_nota_debito_b_7 = (
-        codigo_arca == "7"
-        and "Nota de Débito" in concepto
-        and concepto.endswith("B")
-    )
+    col_ant, col_nue = st.columns(2)
 
-    es_tique_factura_a_81 = (
-        codigo_arca == "81"
-        and "Tique Factura A" in concepto
+    anterior = col_ant.file_uploader(
+        "Exportación anterior (.xlsx)",
+        type=["xlsx"],
+        key="archivo_anterior",
     )
 
-    es_tique_factura_b_82 = (
-        codigo_arca == "82"
-        and "Tique Factura B" in concepto
+    nuevo = col_nue.file_uploader(
+        "Exportación nueva (.xlsx)",
+        type=["xlsx"],
+        key="archivo_nuevo",
     )
 
-    es_comprobante_ajustable = (
-        es_factura_b_6
-        or es_nota_debito_b_7
-        or es_tique_factura_a_81
-        or es_tique_factura_b_82
+    if anterior is None or nuevo is None:
+        st.stop()
+
+    clave_comparacion = (
+        clave_upload(anterior),
+        clave_upload(nuevo),
     )
 
+    comparacion = st.session_state.get("comparacion")
 
-    # ========================================================
-    # MONEDA
-    # ========================================================
+    if comparacion is None or comparacion["clave"] != clave_comparacion:
 
-    moneda = str(
-        row.get(COL_MON, "") or ""
-    ).strip().upper()
+        comparacion, _ = ejecutar_en_pool(
+            "comparar",
+            comparar_archivos,
+            anterior.getvalue(),
+            nuevo.getvalue(),
+        )
 
-    tc = get_num_raw(
-        row,
-        COL_TC,
-    )
+        comparacion["clave"] = clave_comparacion
 
+        st.session_state["comparacion"] = comparacion
 
-    # ========================================================
-    # SIGNO
-    # ========================================================
 
-    def s(valor: float) -> float:
-        """
-        Nota de Crédito -> negativo.
-        Resto -> positivo.
-        """
+    m1, m2, m3 = st.columns(3)
 
-        if valor == 0:
-            return 0.0
+    m1.metric("Nuevos", len(comparacion["nuevos"]))
+    m2.metric("Eliminados", len(comparacion["eliminados"]))
+    m3.metric("Modificados", len(comparacion["modificados"]))
 
-        if es_nc:
-            return -abs(valor)
+    for titulo, tabla in [
+        ("Comprobantes nuevos", comparacion["nuevos"]),
+        ("Comprobantes eliminados", comparacion["eliminados"]),
+        ("Comprobantes modificados", comparacion["modificados"]),
+    ]:
 
-        return abs(valor)
+        if tabla.empty:
+            continue
 
+        st.subheader(titulo)
 
-    # ========================================================
-    # CONVERSIÓN MONEDA
-    # ========================================================
+        st.dataframe(
+            tabla,
+            use_container_width=True,
+        )
 
-    def get_num(row_, col_) -> float:
-        """
-        Obtiene el importe y, si la moneda es USD,
-        lo convierte a pesos utilizando Tipo Cambio.
-        """
+    if comparacion["salida"].empty:
 
-        v = get_num_raw(
-            row_,
-            col_,
+        st.info(
+            "No hay comprobantes nuevos ni modificados "
+            "para descargar."
         )
 
-        if moneda == "USD" and tc != 0:
-            return v * tc
+    else:
+
+        st.download_button(
 
-        return v
+            "📥 Descargar cambios en formato Holistor",
 
+            data=comparacion["excel"],
 
-    # ========================================================
-    # BASE COMÚN DEL COMPROBANTE
-    # ========================================================
+            file_name="Recibidos_cambios.xlsx",
 
-    base = {
+            mime=MIME_XLSX,
+        )
 
-        "Fecha Emisión":
-            row.get(COL_FECHA),
+    mostrar_footer()
 
-        "Fecha Recepción":
-            row.get(COL_FECHA),
+    st.stop()
 
-        "Concepto":
-            concepto,
 
-        "Tipo":
-            tipo,
+# ============================================================
+# MODO CONVERSIÓN
+# ============================================================
 
-        "Letra":
-            letra,
+uploaded = st.file_uploader(
+    "Subí el archivo de ARCA (.xlsx)",
+    type=["xlsx"],
+)
 
-        "Punto de Venta":
-            row.get(COL_PV),
 
-        "Número Desde":
-            row.get(COL_NRO_DESDE),
+# ============================================================
+# DETENER SI TODAVÍA NO SE SUBIÓ ARCHIVO
+# ============================================================
 
-        "Número Hasta":
-            row.get(COL_NRO_HASTA),
+if uploaded is None:
+    st.stop()
 
-        "Cód. Autorización":
-            row.get(COL_COD_AUT),
 
-        "Tipo Doc. Emisor":
-            80,
+# ============================================================
+# CONVERSIÓN
+# ============================================================
+#
+# La lectura, la conversión y la generación del Excel corren
+# en el pool de procesos para no bloquear a las demás sesiones.
+#
+# Si el libro tiene varias hojas con formato de ARCA (una por
+# empresa o por período), cada hoja se convierte en paralelo en
+# su propio proceso del pool.
+#
+# El modo de cada hoja se elige por su tamaño estimado (ver
+# conversor.planificar_libro): los libros chicos se convierten
+# acá mismo y las hojas muy grandes se leen por bloques.
+#
+# El pool trabaja en segundo plano: mientras tanto se muestran
+# las primeras filas ya convertidas y el avance, y la página se
+# completa cuando termina.
+#
+# La salida vuelve como archivo Arrow en memoria compartida
+# (ver intercambio.py): la sesión solo guarda la tabla mapeada.
+#
+# ============================================================
 
-        "Nro. Doc. Emisor":
-            row.get(COL_CUIT_EMISOR),
+# Avance al empezar cada etapa: la parte del tiempo total que
+# llevan las anteriores en una hoja grande. `prueba_carga.py
+# --perfil` mide las etapas: con 100.000 filas, lectura 37 %,
+# conversión menos de 1 %, Excel 63 %.
 
-        "Denominación Emisor":
-            row.get(COL_NOM_EMISOR),
+AVANCE_ETAPAS = {
+    "lectura": 0.0,
+    "conversion": 0.37,
+    "excel": 0.375,
+    "listo": 1.0,
+}
 
-        "Condición Fiscal":
-            "RI" if letra == "A" else "MT",
+PESO_LECTURA = AVANCE_ETAPAS["conversion"]
 
-        # Visibles en grilla / salida
+TITULO_ETAPAS = {
+    "lectura": "leyendo",
+    "conversion": "convirtiendo",
+    "excel": "generando el Excel",
+    "listo": "lista",
+}
 
-        "Tipo Cambio":
-            tc,
 
-        "Moneda":
-            moneda,
+def descartar(resultado: dict):
+    """
+    Borra la salida de un archivo que ya no se usa, incluida la de
+    una conversión que todavía no terminó.
+    """
 
-        # Se completa solo si el comprobante fue ajustado
-        "Control IA":
-            "",
-    }
+    intercambio.borrar(resultado["rutas"])
 
+    tarea = resultado.get("tarea")
 
-    # ========================================================
-    # EXENTO / NO GRAVADO
-    # ========================================================
-    #
-    # Neto No Gravado
-    # + Operaciones Exentas
-    # + Neto Gravado IVA 0%
-    #
-    # ========================================================
+    if tarea is None:
+        return
 
-    exng_val = s(
+    progresos = resultado["progresos"]
 
-        get_num(
-            row,
-            COL_NETO_NG,
+    tarea.descartar(
+        lambda partes: intercambio.borrar(
+            [ruta for ruta, _, _ in partes] + progresos
         )
+    )
 
-        +
 
-        get_num(
-            row,
-            COL_EXENTAS,
-        )
+def avance_hoja(plan: dict, progreso) -> float:
+    """
+    Fracción (0 a 1) convertida de una hoja según su archivo de
+    avance. En la lectura por bloques se cuentan las filas.
+    """
 
-        +
+    if progreso is None:
+        return 0.0
 
-        get_num(
-            row,
-            COL_NETO_0,
-        )
-    )
+    avance = AVANCE_ETAPAS.get(progreso["etapa"], 0.0)
 
+    if progreso["etapa"] == "lectura" and plan["filas"]:
+        avance += PESO_LECTURA * min(1.0, progreso["filas"] / plan["filas"])
 
-    # ========================================================
-    # OTROS TRIBUTOS
-    # ========================================================
+    return avance
 
-    otros_val = s(
-        get_num(
-            row,
-            COL_OTROS,
-        )
-    )
 
+@st.fragment(run_every=1.0)
+def mostrar_avance(resultado: dict):
+    """
+    Avance de la conversión en segundo plano. Se vuelve a dibujar
+    cada segundo; cuando la tarea termina, recarga la página
+    completa.
+    """
+
+    tarea = resultado["tarea"]
+
+    if tarea.terminada():
+        st.rerun()
+
+    progresos = [
+        intercambio.leer_progreso(ruta)
+        for ruta in resultado["progresos"]
+    ]
 
-    # ========================================================
-    # TOTAL ORIGINAL ARCA
-    # ========================================================
+    if tarea.posicion is not None and all(p is None for p in progresos):
 
-    total_val = s(
-        get_num(
-            row,
-            COL_TOTAL,
+        st.info(
+            f"Hay otras conversiones en curso. "
+            f"Tu posición en la cola: {tarea.posicion}"
         )
+
+    avance = sum(
+        avance_hoja(plan, progreso)
+        for (_, plan), progreso in zip(resultado["en_pool"], progresos)
+    ) / len(progresos)
+
+    segundos = time.perf_counter() - resultado["inicio"]
+
+    st.progress(
+        min(avance, 1.0),
+        text=f"Procesando archivo... ({segundos:.0f} s)",
     )
 
+    for (hoja, plan), progreso in zip(resultado["en_pool"], progresos):
 
-    # ========================================================
-    # FILAS DEL COMPROBANTE
-    # ========================================================
+        if progreso is None:
+            estado = "esperando"
 
-    filas_comp = []
+        elif progreso["etapa"] == "lectura" and progreso["filas"]:
+            estado = f"leyendo ({progreso['filas']:,} de ~{plan['filas']:,} filas)"
 
+        else:
+            estado = TITULO_ETAPAS.get(progreso["etapa"], progreso["etapa"])
 
-    # ========================================================
-    # ALÍCUOTAS
-    # ========================================================
+        st.caption(f"{hoja or 'Hoja'}: {estado}")
 
-    aliquotas = [
 
-        (
-            10.5,
-            COL_NETO_105,
-            COL_IVA_105,
-        ),
+def completar(resultado: dict):
+    """
+    Arma la tabla, el índice y los Excel de la conversión una vez
+    que terminó el pool.
+    """
 
-        (
-            21.0,
-            COL_NETO_21,
-            COL_IVA_21,
-        ),
+    tarea = resultado.pop("tarea")
 
-        (
-            27.0,
-            COL_NETO_27,
-            COL_IVA_27,
-        ),
-    ]
+    try:
+        en_pool = iter(tarea.resultado() if tarea is not None else [])
 
+    except ColaLlena:
 
-    for aliq_val, col_neto, col_iva in aliquotas:
+        intercambio.borrar(resultado["rutas"])
+        del st.session_state["resultado"]
 
-        neto = s(
-            get_num(
-                row,
-                col_neto,
-            )
+        st.error(
+            "El servidor está ocupado con muchas conversiones. "
+            "Volvé a intentar en unos minutos."
         )
 
-        iva = s(
-            get_num(
-                row,
-                col_iva,
-            )
-        )
+        st.stop()
+
+    except Exception:
 
+        intercambio.borrar(resultado["rutas"])
+        del st.session_state["resultado"]
 
-        # Si no hay ni neto ni IVA para esa alícuota,
-        # no generar fila.
+        raise
 
-        if neto == 0 and iva == 0:
-            continue
+    intercambio.borrar(resultado["progresos"])
 
+    locales = resultado.pop("locales")
 
-        rec = base.copy()
+    partes = [
+        locales[i] if i in locales else next(en_pool)
+        for i in range(len(resultado["planes"]))
+    ]
 
-        rec["Alicuota"] = aliq_val
+    rutas = [
+        ruta
+        for ruta, _, medidas in partes
+        if medidas["filas_salida"]
+    ]
 
-        rec["Neto"] = neto
+    intercambio.borrar(
+        [ruta for ruta, _, _ in partes if ruta not in rutas]
+    )
 
-        rec["IVA"] = iva
+    tabla = intercambio.abrir(rutas) if rutas else None
 
-        rec["Ex/Ng"] = 0.0
+    # Con varias hojas, el Excel combinado se genera al pedirlo;
+    # los de cada hoja ya vienen del pool.
 
-        rec["Otros Conceptos"] = 0.0
+    por_hoja = None
 
+    if len(partes) > 1:
 
-        filas_comp.append(rec)
+        por_hoja = [
+            {"excel": excel_hoja, "medidas": medidas}
+            for _, excel_hoja, medidas in partes
+        ]
 
+    resultado.update({
+        "rutas": rutas,
+        "tabla": tabla,
+        "excel": partes[0][1] if por_hoja is None else None,
+        "por_hoja": por_hoja,
+        "indice": (
+            None
+            if tabla is None
+            else IndiceSalida(
+                tabla.select(COLUMNAS_INDICE).to_pandas()
+            )
+        ),
+        "excel_filtrado": None,
+        "vista_previa": None,
+    })
 
-    # ========================================================
-    # EXENTO / NO GRAVADO / OTROS
-    # ========================================================
 
-    if filas_comp:
+# El resultado queda en la sesión: los filtros y descargas vuelven
+# a ejecutar el script, pero no la conversión.
 
-        # Si existen alícuotas,
-        # Ex/Ng y Otros se agregan a la primera fila.
+clave_archivo = clave_upload(uploaded)
 
-        if exng_val != 0 or otros_val != 0:
+resultado = st.session_state.get("resultado")
 
-            filas_comp[0]["Ex/Ng"] = exng_val
+if resultado is None or resultado["clave"] != clave_archivo:
 
-            filas_comp[0]["Otros Conceptos"] = otros_val
+    # La salida del archivo anterior ya no se usa.
 
+    if resultado is not None:
+        descartar(resultado)
 
-    else:
+    contenido = uploaded.getvalue()
 
-        # ====================================================
-        # SIN ALÍCUOTAS
-        # ====================================================
-        #
-        # Si hay Ex/Ng u Otros -> utilizar esos importes.
-        #
-        # Si no hay nada discriminado pero existe Total,
-        # mandar el Total completo a Ex/Ng.
-        #
-        # ====================================================
+    # La lista de hojas sale del zip sin abrir ninguna; los
+    # encabezados solo se leen si hay más de una.
 
-        if (
-            exng_val != 0
-            or otros_val != 0
-            or total_val != 0
-        ):
+    hojas = [None]
 
-            rec = base.copy()
+    if len(nombres_hojas(contenido)) > 1:
 
-            rec["Alicuota"] = 0.0
+        hojas = ejecutar_en_pool(
+            "detectar_hojas",
+            hojas_arca,
+            contenido,
+        )
 
-            rec["Neto"] = 0.0
+    carpeta = get_carpeta()
 
-            rec["IVA"] = 0.0
+    # El modo memoria se decide por el libro entero: un libro con
+    # muchas hojas chicas se convierte en paralelo en el pool.
 
+    planes = planificar_libro(contenido, hojas)
 
-            if exng_val != 0 or otros_val != 0:
+    for hoja, plan in zip(hojas, planes):
 
-                rec["Ex/Ng"] = exng_val
+        LOGGER.info(
+            "Hoja %s: ~%d filas x %d columnas, %.1f MB estimados "
+            "(según %s) -> modo %s",
+            hoja or "(primera)",
+            plan["filas"],
+            plan["columnas"],
+            plan["memoria_mb"],
+            plan["fuente"],
+            plan["modo"],
+        )
 
-                rec["Otros Conceptos"] = otros_val
+    # Las hojas chicas se convierten acá; las demás, en el pool,
+    # cada una con su archivo de avance.
 
+    en_pool = [
+        (hoja, plan, intercambio.ruta_progreso(str(carpeta.ruta)))
+        for hoja, plan in zip(hojas, planes)
+        if plan["modo"] != MODO_MEMORIA
+    ]
+
+    resultado = {
+        "clave": clave_archivo,
+        "planes": planes,
+        "en_pool": [(hoja, plan) for hoja, plan, _ in en_pool],
+        "progresos": [progreso for _, _, progreso in en_pool],
+        "inicio": time.perf_counter(),
+        "tarea": None,
+        "vista_previa": None,
+    }
+
+    if en_pool:
 
-            else:
+        resultado["tarea"] = iniciar_en_pool(
+            "convertir",
+            intercambio.procesar_archivo,
+            [
+                (contenido, hoja, str(carpeta.ruta), plan, progreso)
+                for hoja, plan, progreso in en_pool
+            ],
+        )
+
+        # Mientras el pool lee el archivo entero, las primeras
+        # filas se leen y convierten acá (alrededor de un segundo).
+
+        resultado["vista_previa"] = (
+            en_pool[0][0],
+            vista_previa(contenido, en_pool[0][0]),
+        )
 
-                rec["Ex/Ng"] = total_val
+    locales = [
+        i
+        for i, plan in enumerate(planes)
+        if plan["modo"] == MODO_MEMORIA
+    ]
 
-                rec["Otros Conceptos"] = 0.0
+    resultado["locales"] = dict(
+        zip(
+            locales,
+            mapear_local(
+                "convertir",
+                intercambio.procesar_archivo,
+                [
+                    (contenido, hojas[i], str(carpeta.ruta), planes[i])
+                    for i in locales
+                ],
+            ),
+        )
+    )
 
+    resultado["rutas"] = [
+        ruta
+        for ruta, _, _ in resultado["locales"].values()
+    ]
 
-            filas_comp.append(rec)
+    st.session_state["resultado"] = resultado
 
 
-    # ========================================================
-    # AJUSTE ESPECIAL DE TOTAL
-    # 6  - FACTURA B
-    # 7  - NOTA DE DÉBITO B
-    # 81 - TIQUE FACTURA A
-    # 82 - TIQUE FACTURA B
-    # ========================================================
-    #
-    # Si la suma discriminada no coincide con el total
-    # original de ARCA, enviar la diferencia a Ex/Ng.
-    #
-    # IMPORTANTE:
-    # Este ajuste automático se aplica SOLAMENTE a los
-    # códigos 6, 7, 81 y 82. El resto de los comprobantes mantiene
-    # su tratamiento habitual sin correcciones automáticas.
-    #
-    # Cuando se aplica una corrección, se marca el comprobante
-    # con la leyenda "AJUSTADO POR IA - CORROBORAR".
-    # ========================================================
+# ------------------------------------------------------------
+# CONVERSIÓN EN CURSO
+# ------------------------------------------------------------
 
-    if es_comprobante_ajustable and filas_comp:
+if "tarea" in resultado:
 
-        total_calculado = sum(
+    if resultado["tarea"] is not None and not resultado["tarea"].terminada():
 
-            float(r["Neto"])
-            + float(r["IVA"])
-            + float(r["Ex/Ng"])
-            + float(r["Otros Conceptos"])
+        hoja_previa, previa = resultado["vista_previa"]
 
-            for r in filas_comp
+        st.subheader(
+            "Vista previa de la salida"
         )
 
-        diferencia = round(
-            float(total_val)
-            - float(total_calculado),
-            2,
+        st.caption(
+            "Primeras filas convertidas"
+            + (f" de la hoja {hoja_previa}" if hoja_previa else "")
+            + ". El resto del archivo se sigue procesando."
         )
 
-        if abs(diferencia) >= 0.01:
+        if previa.empty:
 
-            filas_comp[0]["Ex/Ng"] = (
-                float(filas_comp[0]["Ex/Ng"])
-                + diferencia
+            st.info(
+                "Las primeras filas del archivo no tienen "
+                "comprobantes con importes."
             )
 
-            for r in filas_comp:
-                r["Control IA"] = (
-                    "AJUSTADO POR IA - CORROBORAR"
-                )
+        else:
 
+            st.dataframe(
+                previa[cols_salida],
+                use_container_width=True,
+            )
 
-    # ========================================================
-    # TOTAL POR FILA
-    # ========================================================
+        mostrar_avance(resultado)
 
-    for rec in filas_comp:
+        mostrar_footer()
 
-        rec["Total"] = (
+        st.stop()
 
-            float(rec["Neto"])
-            + float(rec["IVA"])
-            + float(rec["Ex/Ng"])
-            + float(rec["Otros Conceptos"])
+    completar(resultado)
 
-        )
 
-        registros.append(rec)
+tabla = resultado["tabla"]
+por_hoja = resultado["por_hoja"]
 
 
 # ============================================================
 # VALIDACIÓN
 # ============================================================
 
-if not registros:
+if tabla is None:
 
     st.error(
         "No se encontraron comprobantes con importes."
@@ -774,247 +881,370 @@ if not registros:
 
 
 # ============================================================
-# COLUMNAS DE SALIDA
+# VISTA PREVIA
+# ============================================================
+
+st.subheader(
+    "Vista previa de la salida"
+)
+
+st.dataframe(
+    tabla.slice(0, FILAS_VISTA_PREVIA).select(cols_salida),
+    use_container_width=True,
+)
+
+
+# ============================================================
+# HOJAS DEL LIBRO
 # ============================================================
 
-cols_salida = [
+if por_hoja is not None:
 
-    "Fecha Emisión",
+    st.subheader(
+        "Hojas convertidas"
+    )
 
-    "Fecha Recepción",
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Hoja": hoja["medidas"]["hoja"],
+                    "Modo": hoja["medidas"]["modo"],
+                    "Filas ARCA": hoja["medidas"]["filas_entrada"],
+                    "Filas salida": hoja["medidas"]["filas_salida"],
+                    **{
+                        f"{titulo} (s)": round(
+                            hoja["medidas"]["etapas"].get(etapa, 0.0),
+                            2,
+                        )
+                        for etapa, titulo in [
+                            ("lectura", "Lectura"),
+                            ("conversion", "Conversión"),
+                            ("excel", "Excel"),
+                        ]
+                    },
+                }
+                for hoja in por_hoja
+            ]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
 
-    "Concepto",
 
-    "Tipo",
+# ============================================================
+# DESCARGA
+# ============================================================
 
-    "Letra",
+DESCARGA_COMBINADA = "Un archivo con todas las hojas"
+DESCARGA_POR_HOJA = "Un archivo por hoja"
 
-    "Punto de Venta",
+descarga = DESCARGA_COMBINADA
 
-    "Número Desde",
+if por_hoja is not None:
 
-    "Número Hasta",
+    descarga = st.radio(
+        "Descarga",
+        [DESCARGA_COMBINADA, DESCARGA_POR_HOJA],
+        horizontal=True,
+    )
 
-    "Cód. Autorización",
+if descarga == DESCARGA_COMBINADA:
 
-    "Tipo Doc. Emisor",
+    if resultado["excel"] is None:
 
-    "Nro. Doc. Emisor",
+        resultado["excel"] = ejecutar_en_pool(
+            "excel_combinado",
+            intercambio.generar_excel,
+            resultado["rutas"],
+        )
 
-    "Denominación Emisor",
+    st.download_button(
 
-    "Condición Fiscal",
+        "📥 Descargar Excel procesado",
 
-    "Tipo Cambio",
+        data=resultado["excel"],
 
-    "Moneda",
+        file_name="Recibidos_salida.xlsx",
 
-    "Alicuota",
+        mime=MIME_XLSX,
+    )
 
-    "Neto",
+else:
 
-    "IVA",
+    for hoja in por_hoja:
 
-    "Ex/Ng",
+        if not hoja["excel"]:
+            continue
 
-    "Otros Conceptos",
+        nombre = hoja["medidas"]["hoja"]
 
-    "Total",
+        st.download_button(
 
-    "Control IA",
-]
+            f"📥 Descargar hoja {nombre}",
 
+            data=hoja["excel"],
 
-salida = pd.DataFrame(
-    registros
-)[cols_salida]
+            file_name=(
+                "Recibidos_"
+                + re.sub(r"[^\w-]+", "_", nombre).strip("_")
+                + ".xlsx"
+            ),
+
+            mime=MIME_XLSX,
+
+            key=f"descarga_hoja_{nombre}",
+        )
 
 
 # ============================================================
-# VISTA PREVIA
+# FILTROS
+# ============================================================
+#
+# Los filtros usan los índices precalculados sobre la salida:
+# no se vuelve a convertir ni a generar el Excel completo.
+#
 # ============================================================
 
-st.subheader(
-    "Vista previa de la salida"
-)
+indice = resultado["indice"]
 
-st.dataframe(
-    salida.head(50),
-    use_container_width=True,
+st.subheader(
+    "Revisar comprobantes"
 )
 
+col1, col2, col3 = st.columns(3)
 
-# ============================================================
-# GENERAR EXCEL PARA DESCARGAR
-# ============================================================
+seleccion = {
 
-buffer = BytesIO()
+    "Tipo": col1.multiselect(
+        "Tipo",
+        indice.valores("Tipo"),
+    ),
 
+    "Letra": col2.multiselect(
+        "Letra",
+        indice.valores("Letra"),
+    ),
 
-with pd.ExcelWriter(
-    buffer,
-    engine="xlsxwriter",
-) as writer:
+    "Alicuota": col3.multiselect(
+        "Alicuota",
+        indice.valores("Alicuota"),
+    ),
 
-    salida.to_excel(
-        writer,
-        sheet_name="Salida",
-        index=False,
-    )
+    "Control IA": st.multiselect(
+        "Control IA",
+        [v for v in indice.valores("Control IA") if v],
+    ),
 
+    "Nro. Doc. Emisor": st.multiselect(
+        "Emisor",
+        indice.valores("Nro. Doc. Emisor"),
+        format_func=lambda doc: (
+            f"{doc} - {indice.nombres_emisor.get(doc, '')}"
+        ),
+    ),
+}
 
-    workbook = writer.book
 
-    worksheet = writer.sheets["Salida"]
+desde = hasta = None
 
+rango = indice.rango_fechas()
 
-    # ========================================================
-    # FORMATOS
-    # ========================================================
+if rango is not None:
 
-    money_format = workbook.add_format(
-        {
-            "num_format": "#,##0.00"
-        }
+    fechas = st.date_input(
+        "Fecha de emisión",
+        value=rango,
+        min_value=rango[0],
+        max_value=rango[1],
     )
 
+    if len(fechas) == 2 and tuple(fechas) != rango:
+        desde, hasta = fechas
 
-    col_idx = {
-        name: i
-        for i, name in enumerate(
-            salida.columns
-        )
-    }
 
+posiciones = indice.posiciones_filtradas(
+    seleccion,
+    desde,
+    hasta,
+)
 
-    # ========================================================
-    # IMPORTES
-    # ========================================================
+st.caption(
+    f"{len(posiciones)} de {tabla.num_rows} filas"
+)
 
-    for nombre in [
+st.dataframe(
+    tabla.take(posiciones).select(cols_salida),
+    use_container_width=True,
+)
 
-        "Neto",
 
-        "IVA",
+# ------------------------------------------------------------
+# DESCARGA DEL SUBCONJUNTO FILTRADO
+# ------------------------------------------------------------
+#
+# El Excel filtrado se genera solo a pedido y se guarda por
+# combinación de filtros.
+#
+# ------------------------------------------------------------
 
-        "Ex/Ng",
+if 0 < len(posiciones) < tabla.num_rows:
 
-        "Otros Conceptos",
+    clave_filtro = (
+        tuple(
+            (col, tuple(map(str, valores)))
+            for col, valores in seleccion.items()
+        ),
+        str(desde),
+        str(hasta),
+    )
 
-        "Total",
+    filtrado = resultado["excel_filtrado"]
 
-    ]:
+    if filtrado is None or filtrado[0] != clave_filtro:
 
-        j = col_idx[nombre]
+        if st.button("Preparar Excel filtrado"):
 
-        worksheet.set_column(
-            j,
-            j,
-            15,
-            money_format,
-        )
+            resultado["excel_filtrado"] = filtrado = (
+                clave_filtro,
+                ejecutar_en_pool(
+                    "excel_filtrado",
+                    intercambio.generar_excel,
+                    resultado["rutas"],
+                    posiciones,
+                ),
+            )
 
+    if filtrado is not None and filtrado[0] == clave_filtro:
 
-    # ========================================================
-    # TIPO DE CAMBIO
-    # ========================================================
+        st.download_button(
 
-    if "Tipo Cambio" in col_idx:
+            "📥 Descargar Excel filtrado",
 
-        j = col_idx[
-            "Tipo Cambio"
-        ]
+            data=filtrado[1],
+
+            file_name="Recibidos_salida_filtrada.xlsx",
 
-        worksheet.set_column(
-            j,
-            j,
-            12,
-            money_format,
+            mime=MIME_XLSX,
         )
 
 
-    # ========================================================
-    # MONEDA
-    # ========================================================
+# ============================================================
+# HISTÓRICO DEL CLIENTE
+# ============================================================
+#
+# La salida se agrega al histórico del cliente (Parquet
+# particionado por año / mes) y el acumulado del año se arma
+# leyendo solo las particiones necesarias.
+#
+# ============================================================
 
-    if "Moneda" in col_idx:
+st.subheader(
+    "Histórico del cliente"
+)
 
-        j = col_idx[
-            "Moneda"
-        ]
+cliente = historico.nombre_cliente(
+    st.text_input(
+        "Cliente (CUIT o nombre)",
+        key="cliente",
+    )
+)
+
+if cliente:
 
-        worksheet.set_column(
-            j,
-            j,
-            10,
+    if st.button("Agregar esta conversión al histórico"):
+
+        agregado, _ = ejecutar_en_pool(
+            "historico_agregar",
+            intercambio.agregar_historico,
+            resultado["rutas"],
+            cliente,
         )
 
+        st.success(
+            "Agregado al histórico: "
+            + ", ".join(
+                f"{mes:02d}/{anio} ({filas} filas)"
+                for anio, mes, filas, _ in agregado["periodos"]
+            )
+        )
 
-    # ========================================================
-    # CÓDIGO DE AUTORIZACIÓN / CONTROL IA
-    # ========================================================
+        if agregado["sin_fecha"]:
 
-    if "Cód. Autorización" in col_idx:
-        j = col_idx["Cód. Autorización"]
-        worksheet.set_column(j, j, 20)
+            st.warning(
+                f"{agregado['sin_fecha']} filas sin fecha "
+                "no se agregaron."
+            )
 
-    if "Control IA" in col_idx:
-        j = col_idx["Control IA"]
-        worksheet.set_column(j, j, 32)
+    periodos = historico.periodos(cliente)
 
+    if periodos:
 
-    # ========================================================
-    # ALÍCUOTA
-    # ========================================================
+        col_anio, col_mes = st.columns(2)
 
-    aliq_format = workbook.add_format(
-        {
-            "num_format": "00.000"
-        }
-    )
+        anio = col_anio.selectbox(
+            "Año",
+            sorted({a for a, _ in periodos}, reverse=True),
+        )
 
+        meses = [m for a, m in periodos if a == anio]
 
-    j_aliq = col_idx[
-        "Alicuota"
-    ]
+        hasta_mes = col_mes.selectbox(
+            "Hasta el mes",
+            meses,
+            index=len(meses) - 1,
+            format_func=lambda mes: f"{mes:02d}",
+        )
 
-    worksheet.set_column(
-        j_aliq,
-        j_aliq,
-        8,
-        aliq_format,
-    )
+        # El Excel acumulado se regenera solo si cambió alguna
+        # partición del período.
+
+        clave_acumulado = (
+            cliente,
+            anio,
+            hasta_mes,
+            historico.firma(cliente, anio, hasta_mes),
+        )
 
+        acumulado = st.session_state.get("acumulado")
 
-# Volver al comienzo del archivo generado
+        if acumulado is None or acumulado[0] != clave_acumulado:
 
-buffer.seek(0)
+            acumulado = None
 
+            if st.button("Preparar Excel acumulado del año"):
 
-# ============================================================
-# DESCARGA
-# ============================================================
+                excel_acumulado, _ = ejecutar_en_pool(
+                    "historico_exportar",
+                    historico.exportar_acumulado,
+                    cliente,
+                    anio,
+                    hasta_mes,
+                )
 
-st.download_button(
+                acumulado = (clave_acumulado, excel_acumulado)
 
-    "📥 Descargar Excel procesado",
+                st.session_state["acumulado"] = acumulado
 
-    data=buffer,
+        if acumulado is not None and acumulado[1]:
 
-    file_name="Recibidos_salida.xlsx",
+            st.download_button(
 
-    mime=(
-        "application/vnd.openxmlformats-officedocument."
-        "spreadsheetml.sheet"
-    ),
-)
+                "📥 Descargar acumulado en formato Holistor",
+
+                data=acumulado[1],
+
+                file_name=(
+                    f"Recibidos_{cliente}_{anio}"
+                    f"_01-{hasta_mes:02d}.xlsx"
+                ),
+
+                mime=MIME_XLSX,
+            )
 
 
 # ============================================================
 # FOOTER
 # ============================================================
 
-st.markdown(
-    "© AIE – Herramienta para uso interno | "
-    "Developer Alfonso Alderete"
-)
+mostrar_footer()
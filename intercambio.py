@@ -0,0 +1,266 @@
+# intercambio.py
+# Salida del pool como archivos Arrow IPC con memory map
+# AIE San Justo
+#
+# Devolver la salida desde el pool por pickle la copia y deserializa
+# entera en el proceso de Streamlit. En cambio, el proceso del pool la
+# escribe como archivo Arrow IPC sin compresión en IPC_DIR y devuelve
+# solo la ruta. La UI abre el archivo con memory map: la vista previa,
+# los filtros y las descargas leen las columnas directamente de las
+# páginas compartidas (el caché de páginas del sistema), sin copiar
+# la tabla.
+#
+# Cada sesión tiene su propia carpeta, que se borra al cambiar de
+# archivo o cuando la sesión termina. En la misma carpeta el proceso
+# del pool deja el avance de cada conversión, que la UI consulta
+# mientras espera.
+
+import functools
+import json
+import os
+import shutil
+import uuid
+import weakref
+
+import pyarrow as pa
+
+import conversor
+import historico
+import metricas
+from configuracion import IPC_DIR
+
+
+EXTENSION = ".arrow"
+EXTENSION_PROGRESO = ".progreso"
+
+
+# ============================================================
+# ESCRITURA / LECTURA
+# ============================================================
+
+def escribir(df, carpeta) -> str:
+    """
+    Escribe el DataFrame como archivo Arrow IPC en la carpeta
+    y devuelve su ruta.
+    """
+
+    tabla = pa.Table.from_pandas(
+        df,
+        preserve_index=False,
+    )
+
+    ruta = os.path.join(carpeta, f"{uuid.uuid4().hex}{EXTENSION}")
+    tmp = f"{ruta}.tmp"
+
+    with pa.OSFile(tmp, "wb") as destino:
+        with pa.ipc.new_file(destino, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+
+    os.replace(tmp, ruta)
+
+    return ruta
+
+
+def abrir(rutas) -> pa.Table:
+    """
+    Abre los archivos con memory map y los une en una tabla
+    (sin copiar: cada archivo queda como un bloque de la tabla).
+    """
+
+    tablas = [
+        pa.ipc.open_file(pa.memory_map(ruta, "r")).read_all()
+        for ruta in rutas
+    ]
+
+    # Una columna vacía en una hoja queda como tipo nulo:
+    # promover al tipo de las demás.
+
+    return pa.concat_tables(
+        tablas,
+        promote_options="default",
+    )
+
+
+def a_pandas(rutas, posiciones=None, columnas=None):
+    """
+    DataFrame con las filas y columnas pedidas; solo esas se
+    convierten.
+    """
+
+    tabla = abrir(rutas)
+
+    if columnas is not None:
+        tabla = tabla.select(columnas)
+
+    if posiciones is not None:
+        tabla = tabla.take(posiciones)
+
+    return tabla.to_pandas()
+
+
+def borrar(rutas):
+
+    for ruta in rutas:
+        try:
+            os.unlink(ruta)
+
+        except OSError:
+            pass
+
+
+# ============================================================
+# AVANCE
+# ============================================================
+
+def ruta_progreso(carpeta) -> str:
+    """
+    Ruta nueva para el archivo de avance de una conversión.
+    """
+
+    return os.path.join(carpeta, f"{uuid.uuid4().hex}{EXTENSION_PROGRESO}")
+
+
+def escribir_progreso(ruta: str, etapa: str, filas: int):
+    """
+    Guarda la etapa en curso y las filas leídas hasta ahora.
+    """
+
+    tmp = f"{ruta}.tmp"
+
+    with open(tmp, "w", encoding="utf-8") as destino:
+        json.dump({"etapa": etapa, "filas": filas}, destino)
+
+    os.replace(tmp, ruta)
+
+
+def leer_progreso(ruta: str):
+    """
+    Devuelve {"etapa", "filas"} o None si la conversión todavía
+    no empezó.
+    """
+
+    try:
+        with open(ruta, encoding="utf-8") as origen:
+            return json.load(origen)
+
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================
+# CARPETA DE CADA SESIÓN
+# ============================================================
+
+class CarpetaSesion:
+    """
+    Carpeta de intercambio de una sesión de Streamlit.
+
+    Se borra con liberar(); si nadie la libera, al descartarse el
+    objeto o al terminar el proceso.
+    """
+
+    def __init__(self):
+
+        podar_huerfanas()
+
+        self.ruta = IPC_DIR / f"{os.getpid()}-{uuid.uuid4().hex}"
+        self.ruta.mkdir(parents=True, exist_ok=True)
+
+        self._finalizar = weakref.finalize(
+            self,
+            shutil.rmtree,
+            str(self.ruta),
+            True,
+        )
+
+
+    def liberar(self):
+
+        self._finalizar()
+
+
+def podar_huerfanas():
+    """
+    Borra las carpetas que dejó un proceso de Streamlit que ya no
+    existe (por ejemplo, después de un reinicio forzado).
+    """
+
+    for carpeta in IPC_DIR.glob("*-*"):
+
+        try:
+            pid = int(carpeta.name.split("-", 1)[0])
+
+        except ValueError:
+            continue
+
+        if pid == os.getpid():
+            continue
+
+        try:
+            os.kill(pid, 0)
+
+        except ProcessLookupError:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+        except OSError:
+            continue
+
+
+# ============================================================
+# TRABAJOS DEL POOL
+# ============================================================
+#
+# Versiones de las funciones del pool que reciben / devuelven
+# rutas de archivos Arrow en lugar de DataFrames.
+#
+# ============================================================
+
+def procesar_archivo(contenido: bytes, hoja, carpeta, plan=None, progreso=None):
+    """
+    conversor.procesar_archivo, dejando la salida en la carpeta.
+    Devuelve (ruta, excel_bytes, medidas).
+
+    Si se pasa `progreso` (ver ruta_progreso), el avance se va
+    guardando en ese archivo.
+    """
+
+    al_avanzar = None
+
+    if progreso is not None:
+        al_avanzar = functools.partial(escribir_progreso, progreso)
+
+    salida, excel_bytes, medidas = conversor.procesar_archivo(
+        contenido,
+        hoja,
+        plan,
+        al_avanzar,
+    )
+
+    with metricas.cronometro(medidas, "intercambio"):
+        ruta = escribir(salida, carpeta)
+
+    if progreso is not None:
+        escribir_progreso(progreso, "listo", medidas["filas_entrada"])
+
+    return ruta, excel_bytes, medidas
+
+
+def generar_excel(rutas, posiciones=None) -> bytes:
+    """
+    Excel de salida de las filas elegidas (todas si es None).
+    """
+
+    return conversor.generar_excel(
+        a_pandas(rutas, posiciones)
+    )
+
+
+def agregar_historico(rutas, cliente: str):
+    """
+    historico.agregar sobre la salida guardada.
+    """
+
+    return historico.agregar(
+        a_pandas(rutas),
+        cliente,
+    )
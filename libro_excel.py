@@ -0,0 +1,218 @@
+# libro_excel.py
+# Hojas y metadatos del Excel de ARCA sin leer los datos
+# AIE San Justo
+#
+# Un .xlsx es un zip: la lista de hojas está en xl/workbook.xml y se
+# obtiene sin abrir ninguna hoja. Solo si el libro tiene varias hojas
+# se leen sus encabezados (fila 2) para saber cuáles son de ARCA.
+#
+# El tamaño de cada hoja se estima con el rango <dimension> que está
+# al principio de su XML (o, si falta, con el tamaño del XML), sin
+# leer las filas.
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+
+NS_HOJA = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = (
+    "{http://schemas.openxmlformats.org/officeDocument/2006/"
+    "relationships}id"
+)
+NS_RELACIONES = (
+    "{http://schemas.openxmlformats.org/package/2006/relationships}"
+)
+
+PATRON_DIMENSION = re.compile(
+    rb'<(?:\w+:)?dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"'
+)
+
+# Sin <dimension>: bytes de XML por fila de un archivo de ARCA y
+# columnas habituales. `prueba_carga.py --perfil` mide los bytes por
+# fila: unos 700 en los libros sintéticos.
+
+BYTES_XML_POR_FILA = 700
+COLUMNAS_HABITUALES = 30
+
+# Fila de encabezados en los archivos de ARCA (header=1 en pandas).
+
+FILA_ENCABEZADOS = 2
+
+
+# ============================================================
+# HOJAS
+# ============================================================
+
+def nombres_hojas(contenido: bytes) -> list:
+    """
+    Nombres de las hojas del libro, en orden.
+    Si el archivo no es un .xlsx válido devuelve [].
+    """
+
+    try:
+        with zipfile.ZipFile(BytesIO(contenido)) as libro:
+            raiz = ET.fromstring(libro.read("xl/workbook.xml"))
+
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        return []
+
+    return [
+        hoja.get("name")
+        for hoja in raiz.iter(f"{NS_HOJA}sheet")
+    ]
+
+
+def encabezados(contenido: bytes) -> dict:
+    """
+    Encabezados (fila 2) de cada hoja de datos del libro.
+    Lee solo las dos primeras filas de cada hoja.
+    """
+
+    libro = load_workbook(
+        BytesIO(contenido),
+        read_only=True,
+        data_only=True,
+    )
+
+    resultado = {}
+
+    try:
+
+        for hoja in libro.worksheets:
+
+            filas = hoja.iter_rows(
+                min_row=FILA_ENCABEZADOS,
+                max_row=FILA_ENCABEZADOS,
+                values_only=True,
+            )
+
+            fila = next(filas, ())
+
+            resultado[hoja.title] = [
+                str(valor).strip()
+                for valor in fila
+                if valor is not None
+            ]
+
+    finally:
+        libro.close()
+
+    return resultado
+
+
+def hojas_arca(contenido: bytes, requeridas) -> list:
+    """
+    Hojas del libro que tienen el formato de ARCA (todas las
+    columnas `requeridas` en la fila de encabezados).
+
+    Con una sola hoja no se verifica nada: se devuelve esa hoja,
+    como siempre. Si ninguna coincide se devuelve la primera,
+    para que la lectura informe el problema como hasta ahora.
+    """
+
+    nombres = nombres_hojas(contenido)
+
+    if len(nombres) <= 1:
+        return nombres
+
+    requeridas = set(requeridas)
+
+    coinciden = [
+        hoja
+        for hoja, columnas in encabezados(contenido).items()
+        if requeridas <= set(columnas)
+    ]
+
+    return coinciden or nombres[:1]
+
+
+# ============================================================
+# TAMAÑO ESTIMADO
+# ============================================================
+
+def _columna_a_numero(letras: bytes) -> int:
+
+    numero = 0
+
+    for letra in letras:
+        numero = numero * 26 + (letra - ord("A") + 1)
+
+    return numero
+
+
+def _ruta_hoja(libro: zipfile.ZipFile, hoja) -> str:
+    """
+    Ruta dentro del zip del XML de la hoja (None = la primera).
+    """
+
+    raiz = ET.fromstring(libro.read("xl/workbook.xml"))
+
+    hojas = list(raiz.iter(f"{NS_HOJA}sheet"))
+
+    elegida = hojas[0] if hoja is None else next(
+        h for h in hojas if h.get("name") == hoja
+    )
+
+    relaciones = ET.fromstring(libro.read("xl/_rels/workbook.xml.rels"))
+
+    destino = next(
+        r.get("Target")
+        for r in relaciones.iter(f"{NS_RELACIONES}Relationship")
+        if r.get("Id") == elegida.get(NS_REL)
+    )
+
+    if destino.startswith("/"):
+        return destino.lstrip("/")
+
+    return posixpath.normpath(posixpath.join("xl", destino))
+
+
+def estimar(contenido: bytes, hoja=None):
+    """
+    Tamaño de la hoja sin leer sus filas.
+
+    Devuelve {"filas", "columnas", "bytes_xml", "fuente"} o None si
+    el archivo no es un .xlsx válido. `fuente` indica si las filas
+    salen del rango <dimension> o del tamaño del XML.
+    """
+
+    try:
+        with zipfile.ZipFile(BytesIO(contenido)) as libro:
+
+            ruta = _ruta_hoja(libro, hoja)
+
+            bytes_xml = libro.getinfo(ruta).file_size
+
+            # <dimension> está antes de <sheetData>: alcanza con
+            # descomprimir el comienzo.
+
+            with libro.open(ruta) as xml:
+                comienzo = xml.read(4096)
+
+    except (zipfile.BadZipFile, KeyError, StopIteration, ET.ParseError):
+        return None
+
+    rango = PATRON_DIMENSION.search(comienzo)
+
+    # Algunos programas escriben "A1" aunque la hoja tenga datos.
+
+    if rango is not None and rango.group(3) is not None:
+
+        return {
+            "filas": max(0, int(rango.group(4)) - FILA_ENCABEZADOS),
+            "columnas": _columna_a_numero(rango.group(3)),
+            "bytes_xml": bytes_xml,
+            "fuente": "dimension",
+        }
+
+    return {
+        "filas": bytes_xml // BYTES_XML_POR_FILA,
+        "columnas": COLUMNAS_HABITUALES,
+        "bytes_xml": bytes_xml,
+        "fuente": "tamaño",
+    }
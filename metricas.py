@@ -0,0 +1,451 @@
+# metricas.py
+# Métricas operativas del conversor en formato Prometheus
+# AIE San Justo
+#
+# Los procesos del pool miden sus etapas con `cronometro` y devuelven
+# las medidas junto con el resultado; el proceso de Streamlit las
+# acumula en un único Registro y las expone en formato de texto de
+# Prometheus, en un archivo que se reescribe periódicamente y/o en un
+# endpoint HTTP local. Sin servicios externos.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+
+except ImportError:  # Windows
+    resource = None
+
+
+PREFIJO = "iarecibidos"
+
+
+# Límites de los histogramas
+
+BUCKETS_SEGUNDOS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+
+BUCKETS_BYTES = (
+    64 * 1024, 256 * 1024, 1024**2, 4 * 1024**2,
+    16 * 1024**2, 64 * 1024**2, 256 * 1024**2,
+)
+
+
+# ============================================================
+# MEDICIÓN EN LOS PROCESOS DEL POOL
+# ============================================================
+
+@contextmanager
+def cronometro(medidas: dict, etapa: str):
+    """
+    Suma a medidas["etapas"][etapa] los segundos del bloque.
+    """
+
+    inicio = time.perf_counter()
+
+    try:
+        yield
+
+    finally:
+        etapas = medidas.setdefault("etapas", {})
+        etapas[etapa] = (
+            etapas.get(etapa, 0.0)
+            + time.perf_counter()
+            - inicio
+        )
+
+
+def memoria_pico() -> int:
+    """
+    Memoria máxima (RSS) del proceso actual, en bytes.
+    """
+
+    if resource is None:
+        return 0
+
+    # Linux informa KB.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memoria_actual() -> int:
+    """
+    Memoria actual (RSS) del proceso, en bytes (0 si no se sabe).
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+
+    except (OSError, ValueError, IndexError):
+        return 0
+
+    return paginas * os.sysconf("SC_PAGE_SIZE")
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+def _numero(valor) -> str:
+
+    valor = float(valor)
+
+    if valor.is_integer():
+        return str(int(valor))
+
+    return repr(valor)
+
+
+def _etiquetas(etiquetas: dict) -> str:
+
+    if not etiquetas:
+        return ""
+
+    partes = ",".join(
+        f'{k}="{str(v)}"'
+        for k, v in sorted(etiquetas.items())
+    )
+
+    return "{" + partes + "}"
+
+
+class Registro:
+    """
+    Contadores, gauges e histogramas con etiquetas.
+    Seguro para usar desde varios hilos (sesiones).
+    """
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+
+        self._ayuda = {}
+        self._tipos = {}
+
+        # nombre -> {etiquetas (tupla): valor}
+        self._valores = {}
+
+        # nombre -> {etiquetas: [conteos por bucket, suma, cantidad]}
+        self._histogramas = {}
+        self._buckets = {}
+
+
+    def _declarar(self, nombre, tipo, ayuda, buckets=None):
+
+        if nombre not in self._tipos:
+            self._tipos[nombre] = tipo
+            self._ayuda[nombre] = ayuda
+
+            if buckets is not None:
+                self._buckets[nombre] = buckets
+
+
+    def incrementar(self, nombre, ayuda, valor=1.0, **etiquetas):
+
+        with self._lock:
+            self._declarar(nombre, "counter", ayuda)
+            serie = self._valores.setdefault(nombre, {})
+            clave = tuple(sorted(etiquetas.items()))
+            serie[clave] = serie.get(clave, 0.0) + valor
+
+
+    def fijar(self, nombre, ayuda, valor, **etiquetas):
+
+        with self._lock:
+            self._declarar(nombre, "gauge", ayuda)
+            serie = self._valores.setdefault(nombre, {})
+            serie[tuple(sorted(etiquetas.items()))] = float(valor)
+
+
+    def fijar_maximo(self, nombre, ayuda, valor, **etiquetas):
+
+        with self._lock:
+            self._declarar(nombre, "gauge", ayuda)
+            serie = self._valores.setdefault(nombre, {})
+            clave = tuple(sorted(etiquetas.items()))
+            serie[clave] = max(serie.get(clave, 0.0), float(valor))
+
+
+    def observar(self, nombre, ayuda, valor, buckets=BUCKETS_SEGUNDOS, **etiquetas):
+
+        with self._lock:
+            self._declarar(nombre, "histogram", ayuda, buckets)
+            serie = self._histogramas.setdefault(nombre, {})
+            clave = tuple(sorted(etiquetas.items()))
+
+            datos = serie.setdefault(
+                clave,
+                [[0] * len(self._buckets[nombre]), 0.0, 0],
+            )
+
+            for i, limite in enumerate(self._buckets[nombre]):
+                if valor <= limite:
+                    datos[0][i] += 1
+
+            datos[1] += valor
+            datos[2] += 1
+
+
+    def texto_prometheus(self) -> str:
+        """
+        Todas las métricas en el formato de exposición de texto.
+        """
+
+        lineas = []
+
+        with self._lock:
+
+            for nombre in sorted(self._tipos):
+
+                completo = f"{PREFIJO}_{nombre}"
+
+                lineas.append(f"# HELP {completo} {self._ayuda[nombre]}")
+                lineas.append(f"# TYPE {completo} {self._tipos[nombre]}")
+
+                if self._tipos[nombre] != "histogram":
+
+                    for clave, valor in sorted(self._valores[nombre].items()):
+                        lineas.append(
+                            f"{completo}{_etiquetas(dict(clave))} {_numero(valor)}"
+                        )
+
+                    continue
+
+                for clave, (conteos, suma, cantidad) in sorted(
+                    self._histogramas[nombre].items()
+                ):
+
+                    etiquetas = dict(clave)
+
+                    for limite, conteo in zip(self._buckets[nombre], conteos):
+                        lineas.append(
+                            f"{completo}_bucket"
+                            f"{_etiquetas({**etiquetas, 'le': _numero(limite)})}"
+                            f" {conteo}"
+                        )
+
+                    lineas.append(
+                        f"{completo}_bucket"
+                        f"{_etiquetas({**etiquetas, 'le': '+Inf'})}"
+                        f" {cantidad}"
+                    )
+                    lineas.append(
+                        f"{completo}_sum{_etiquetas(etiquetas)} {_numero(suma)}"
+                    )
+                    lineas.append(
+                        f"{completo}_count{_etiquetas(etiquetas)} {cantidad}"
+                    )
+
+        return "\n".join(lineas) + "\n"
+
+
+# ============================================================
+# REGISTRO DE UNA OPERACIÓN
+# ============================================================
+
+def registrar_operacion(
+    registro: Registro,
+    operacion: str,
+    resultado: str,
+    segundos: float,
+    medidas=None,
+    proceso: str = "pool",
+):
+    """
+    Acumula en el registro una operación completa del pool
+    (conversión, comparación, Excel filtrado).
+
+    `medidas` son las de la operación o, si se hizo por hojas, una
+    lista con las de cada hoja: la operación se cuenta una sola vez
+    (con su duración total) y las etapas, filas y modos, por hoja.
+    `proceso` indica dónde corrió ("pool" o "streamlit"), para no
+    mezclar la memoria de ambos.
+    """
+
+    if isinstance(medidas, dict):
+        medidas = [medidas]
+
+    medidas = [m for m in medidas or [] if m]
+
+    # Si todas las hojas terminaron igual (p. ej. sin comprobantes),
+    # ese es el resultado de la operación.
+
+    resultados = {m.get("resultado", resultado) for m in medidas}
+
+    if len(resultados) == 1:
+        resultado = resultados.pop()
+
+    registro.incrementar(
+        "operaciones_total",
+        "Operaciones por tipo y resultado.",
+        operacion=operacion,
+        resultado=resultado,
+    )
+
+    registro.observar(
+        "operacion_segundos",
+        "Duración total de la operación (incluye la espera en cola).",
+        segundos,
+        operacion=operacion,
+        resultado=resultado,
+    )
+
+    if not medidas:
+        return
+
+    bytes_entrada = [m["bytes_entrada"] for m in medidas if "bytes_entrada" in m]
+
+    # Las hojas de un libro comparten el archivo: se cuenta una vez.
+
+    if bytes_entrada:
+        registro.observar(
+            "archivo_bytes",
+            "Tamaño de los archivos subidos.",
+            max(bytes_entrada),
+            buckets=BUCKETS_BYTES,
+            operacion=operacion,
+        )
+
+    for medidas_hoja in medidas:
+        _registrar_hoja(registro, operacion, medidas_hoja, proceso)
+
+
+def _registrar_hoja(registro: Registro, operacion: str, medidas: dict, proceso: str):
+
+    for etapa, segundos_etapa in medidas.get("etapas", {}).items():
+        registro.observar(
+            "etapa_segundos",
+            "Duración de cada etapa, por hoja.",
+            segundos_etapa,
+            operacion=operacion,
+            etapa=etapa,
+        )
+
+    if "modo" in medidas:
+        registro.incrementar(
+            "hojas_total",
+            "Hojas procesadas por modo de ejecución.",
+            operacion=operacion,
+            modo=medidas["modo"],
+        )
+
+    for clave, ayuda in [
+        ("filas_entrada", "Filas leídas de ARCA."),
+        ("filas_salida", "Filas generadas en formato Holistor."),
+        ("filas_ajustadas", "Filas marcadas AJUSTADO POR IA."),
+    ]:
+        if clave in medidas:
+            registro.incrementar(
+                f"{clave}_total",
+                ayuda,
+                medidas[clave],
+                operacion=operacion,
+            )
+
+    if not medidas.get("memoria_pico"):
+        return
+
+    if proceso == "pool":
+        registro.fijar_maximo(
+            "memoria_pico_pool_bytes",
+            "Memoria máxima (RSS) informada por un proceso del pool.",
+            medidas["memoria_pico"],
+        )
+
+    else:
+        registro.fijar_maximo(
+            "memoria_pico_streamlit_bytes",
+            "Memoria máxima (RSS) del proceso de Streamlit al "
+            "convertir sin pasar por el pool.",
+            medidas["memoria_pico"],
+        )
+
+
+# ============================================================
+# EXPOSICIÓN
+# ============================================================
+
+def escribir_archivo(registro: Registro, ruta: str):
+    """
+    Escribe las métricas en `ruta` (escritura atómica).
+    """
+
+    tmp = f"{ruta}.tmp"
+
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registro.texto_prometheus())
+
+    os.replace(tmp, ruta)
+
+
+def iniciar_exposicion(registro: Registro, ruta="", intervalo=15, puerto=0, al_exponer=None):
+    """
+    Arranca (en hilos daemon) la escritura periódica del archivo
+    y/o el endpoint HTTP /metrics en 127.0.0.1:puerto.
+
+    `al_exponer` se llama antes de cada exposición para actualizar
+    gauges (memoria, cola).
+    """
+
+    def actualizar():
+        if al_exponer is not None:
+            al_exponer(registro)
+
+    if ruta:
+
+        def escribir_periodicamente():
+
+            while True:
+
+                try:
+                    actualizar()
+                    escribir_archivo(registro, ruta)
+
+                except OSError:
+                    pass
+
+                time.sleep(intervalo)
+
+        threading.Thread(
+            target=escribir_periodicamente,
+            name="metricas-archivo",
+            daemon=True,
+        ).start()
+
+    if puerto:
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+
+                actualizar()
+                cuerpo = registro.texto_prometheus().encode("utf-8")
+
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type",
+                    "text/plain; version=0.0.4; charset=utf-8",
+                )
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Handler)
+
+        threading.Thread(
+            target=servidor.serve_forever,
+            name="metricas-http",
+            daemon=True,
+        ).start()
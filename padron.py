@@ -0,0 +1,264 @@
+# padron.py
+# Índice local del padrón de contribuyentes de ARCA
+# AIE San Justo
+#
+# El padrón (millones de CUITs) se convierte UNA vez en un índice
+# compacto: un arreglo ordenado de CUITs y arreglos paralelos con la
+# condición fiscal y la denominación. Se abren con memory-map, así
+# que cargarlo no lee el archivo y los procesos del pool comparten
+# las mismas páginas. La búsqueda es un searchsorted vectorizado.
+#
+# Uso:
+#   python padron.py padron.zip [carpeta_destino]
+
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from configuracion import PADRON_DIR
+
+
+# ============================================================
+# FORMATO DEL PADRÓN (ANCHO FIJO)
+# ============================================================
+#
+# CUIT                      11
+# Denominación              30
+# Imp. Ganancias             2
+# Imp. IVA                   2   AC / EX / NA / NI / XN / AN
+# Monotributo                2   NI o categoría
+# Integrante Sociedades      1
+# Empleador                  1
+# Actividad Monotributo      2
+#
+# ============================================================
+
+ANCHO_CUIT = 11
+ANCHO_NOMBRE = 30
+
+POS_IVA = 43
+POS_MONOTRIBUTO = 45
+
+LARGO_REGISTRO = 51
+
+
+# Código guardado en el índice -> Condición Fiscal Holistor.
+# 0 = sin dato (se usa la deducción por letra).
+
+CONDICIONES = np.array(
+    ["", "RI", "MT", "EX", "NR"],
+    dtype=object,
+)
+
+ARCHIVO_CUITS = "cuits.npy"
+ARCHIVO_CONDICION = "condicion.npy"
+ARCHIVO_NOMBRES = "nombres.npy"
+
+
+# ============================================================
+# CONSTRUCCIÓN DEL ÍNDICE
+# ============================================================
+
+def _leer_crudo(origen: Path) -> bytes:
+
+    if origen.suffix.lower() == ".zip":
+
+        with zipfile.ZipFile(origen) as z:
+            nombre = max(
+                z.infolist(),
+                key=lambda i: i.file_size,
+            ).filename
+
+            return z.read(nombre)
+
+    return origen.read_bytes()
+
+
+def construir_indice(origen, destino=PADRON_DIR) -> int:
+    """
+    Convierte el padrón de ancho fijo en el índice.
+    Devuelve la cantidad de CUITs.
+    """
+
+    crudo = _leer_crudo(Path(origen))
+
+    # Largo de línea real (con \n o \r\n) tomado de la primera.
+
+    largo_linea = crudo.index(b"\n") + 1
+
+    if largo_linea < LARGO_REGISTRO:
+        raise ValueError("El archivo no tiene el formato del padrón.")
+
+    # Última línea sin salto: completarla.
+
+    resto = len(crudo) % largo_linea
+
+    if resto:
+        crudo += b" " * (largo_linea - resto)
+
+    n = len(crudo) // largo_linea
+
+    filas = np.frombuffer(
+        crudo,
+        dtype=np.uint8,
+        count=n * largo_linea,
+    ).reshape(n, largo_linea)
+
+
+    # CUIT: 11 dígitos ASCII -> entero.
+
+    digitos = filas[:, :ANCHO_CUIT].astype(np.int64) - ord("0")
+
+    pesos = 10 ** np.arange(
+        ANCHO_CUIT - 1,
+        -1,
+        -1,
+        dtype=np.int64,
+    )
+
+    cuits = digitos @ pesos
+
+    # Descartar líneas cuyo CUIT no son 11 dígitos
+    # (encabezados, líneas en blanco).
+
+    validas = ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+
+    filas = filas[validas]
+    cuits = cuits[validas]
+    n = len(cuits)
+
+
+    # Condición fiscal.
+
+    iva = filas[:, POS_IVA:POS_IVA + 2].copy().view("S2").ravel()
+    mono = filas[:, POS_MONOTRIBUTO:POS_MONOTRIBUTO + 2].copy().view("S2").ravel()
+
+    condicion = np.select(
+        [
+            iva == b"AC",
+            (mono != b"NI") & (mono != b"  "),
+            iva == b"EX",
+            np.isin(iva, [b"NA", b"NI", b"XN", b"AN"]),
+        ],
+        [1, 2, 3, 4],
+        default=0,
+    ).astype(np.uint8)
+
+
+    nombres = (
+        filas[:, ANCHO_CUIT:ANCHO_CUIT + ANCHO_NOMBRE]
+        .copy()
+        .view(f"S{ANCHO_NOMBRE}")
+        .ravel()
+    )
+
+
+    # Ordenar por CUIT.
+
+    orden = np.argsort(cuits, kind="stable")
+
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+
+    np.save(destino / ARCHIVO_CUITS, cuits[orden])
+    np.save(destino / ARCHIVO_CONDICION, condicion[orden])
+    np.save(destino / ARCHIVO_NOMBRES, nombres[orden])
+
+    return n
+
+
+# ============================================================
+# CARGA (MEMORY-MAP)
+# ============================================================
+
+_indice = None
+
+
+def cargar_indice(carpeta=PADRON_DIR):
+    """
+    Abre el índice con memory-map (una vez por proceso).
+    Devuelve None si no hay índice.
+    """
+
+    global _indice
+
+    if _indice is None:
+
+        carpeta = Path(carpeta)
+
+        if not (carpeta / ARCHIVO_CUITS).exists():
+            return None
+
+        _indice = tuple(
+            np.load(carpeta / archivo, mmap_mode="r")
+            for archivo in (
+                ARCHIVO_CUITS,
+                ARCHIVO_CONDICION,
+                ARCHIVO_NOMBRES,
+            )
+        )
+
+    return _indice
+
+
+# ============================================================
+# BÚSQUEDA VECTORIZADA
+# ============================================================
+
+def buscar(cuits: np.ndarray):
+    """
+    Busca los CUITs en el padrón.
+
+    Devuelve (condicion, denominacion) como arreglos; "" / None
+    donde el CUIT no está. Devuelve None si no hay índice.
+    """
+
+    indice = cargar_indice()
+
+    if indice is None:
+        return None
+
+    idx_cuits, idx_condicion, idx_nombres = indice
+
+    if len(idx_cuits) == 0:
+        return None
+
+    # Buscar una sola vez cada CUIT distinto.
+
+    unicos, inversa = np.unique(cuits, return_inverse=True)
+
+    pos = np.searchsorted(idx_cuits, unicos)
+    pos = np.minimum(pos, len(idx_cuits) - 1)
+
+    encontrado = np.asarray(idx_cuits[pos]) == unicos
+    pos = pos[encontrado]
+
+    condicion = np.full(len(unicos), "", dtype=object)
+    condicion[encontrado] = CONDICIONES[idx_condicion[pos]]
+
+    denominacion = np.full(len(unicos), None, dtype=object)
+    denominacion[encontrado] = [
+        nombre.decode("latin-1").strip()
+        for nombre in idx_nombres[pos]
+    ]
+
+    condicion = condicion[inversa]
+    denominacion = denominacion[inversa]
+
+    return condicion, denominacion
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("Uso: python padron.py padron.zip [carpeta_destino]")
+        sys.exit(1)
+
+    total = construir_indice(
+        sys.argv[1],
+        sys.argv[2] if len(sys.argv) > 2 else PADRON_DIR,
+    )
+
+    print(f"Índice generado: {total} CUITs")
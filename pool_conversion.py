@@ -0,0 +1,333 @@
+# pool_conversion.py
+# Pool de procesos compartido entre las sesiones de Streamlit
+# AIE San Justo
+#
+# La conversión y la generación del Excel son CPU-bound. Ejecutadas
+# en los hilos de un único proceso de Streamlit se bloquean entre sí
+# por el GIL; en un pool de procesos escalan con los núcleos.
+
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ColaLlena(Exception):
+    """
+    Se alcanzó la cantidad máxima de conversiones en espera.
+    """
+
+
+# ============================================================
+# POOL CON COLA FIFO
+# ============================================================
+
+class PoolConversion:
+    """
+    Pool de procesos de tamaño limitado con cola de espera.
+
+    Como máximo `max_procesos` conversiones corren a la vez y como
+    máximo `max_cola` esperan turno. Las que esperan se atienden en
+    orden de llegada y pueden informar su posición.
+    """
+
+    def __init__(self, max_procesos: int, max_cola: int):
+
+        self.max_procesos = max_procesos
+        self.max_cola = max_cola
+
+        self._cond = threading.Condition()
+        self._espera = deque()
+        self._en_curso = 0
+
+        self._executor = self._nuevo_executor()
+
+
+    def _nuevo_executor(self):
+
+        # Streamlit instala el script de la app como "__main__", así
+        # que con "spawn" / "forkserver" cada proceso nuevo volvería a
+        # ejecutar la interfaz. Con "fork" el proceso hereda los
+        # módulos ya importados y solo corre conversor.py.
+        #
+        # Donde no hay fork (Windows) se usan hilos: sin paralelismo
+        # real, pero con el mismo límite de concurrencia y cola.
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return ThreadPoolExecutor(
+                max_workers=self.max_procesos,
+            )
+
+        return ProcessPoolExecutor(
+            max_workers=self.max_procesos,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+
+
+    def estado(self):
+        """
+        Devuelve (en_curso, en_espera).
+        """
+
+        with self._cond:
+            return self._en_curso, len(self._espera)
+
+
+    def ejecutar(self, fn, *args, al_esperar=None):
+        """
+        Ejecuta fn(*args) en el pool y devuelve su resultado.
+
+        Mientras espera turno llama a al_esperar(posicion) cada vez
+        que la posición en la cola cambia (1 = próximo en entrar).
+        """
+
+        return self.mapear(fn, [args], al_esperar=al_esperar)[0]
+
+
+    def mapear_en_fondo(self, fn, lista_args, al_terminar=None):
+        """
+        Como mapear, pero sin esperar: devuelve una Tarea que corre
+        en un hilo aparte y se consulta con terminada() / resultado().
+
+        al_terminar(tarea), si se pasa, se llama desde ese hilo
+        cuando termina (bien o con error).
+        """
+
+        return Tarea(self, fn, lista_args, al_terminar)
+
+
+    def mapear(self, fn, lista_args, al_esperar=None):
+        """
+        Ejecuta fn(*args) para cada elemento de lista_args y devuelve
+        los resultados en el mismo orden.
+
+        Cada elemento ocupa su propio lugar en la cola: se envía al
+        pool apenas le toca turno, así que corren en paralelo hasta
+        donde lo permitan los procesos libres, sin adelantarse a las
+        conversiones de otras sesiones.
+        """
+
+        tickets = [object() for _ in lista_args]
+
+        with self._cond:
+
+            if (
+                len(self._espera) >= self.max_cola
+                and self._en_curso >= self.max_procesos
+            ):
+                raise ColaLlena()
+
+            self._espera.extend(tickets)
+
+        enviados = []
+
+        try:
+
+            for ticket, args in zip(tickets, lista_args):
+
+                self._esperar_turno(ticket, al_esperar)
+
+                enviados.append(self._enviar(fn, args))
+
+        except BaseException:
+
+            # Sesión cancelada mientras esperaba: liberar los lugares
+            # que no llegaron a usarse.
+
+            with self._cond:
+                for ticket in tickets:
+                    if ticket in self._espera:
+                        self._espera.remove(ticket)
+                self._cond.notify_all()
+
+            for _, futuro in enviados:
+                futuro.cancel()
+
+            raise
+
+        return [
+            self._resultado(executor, futuro)
+            for executor, futuro in enviados
+        ]
+
+
+    def _esperar_turno(self, ticket, al_esperar):
+
+        ultima_posicion = None
+
+        while True:
+
+            with self._cond:
+
+                if (
+                    self._espera[0] is ticket
+                    and self._en_curso < self.max_procesos
+                ):
+                    self._espera.popleft()
+                    self._en_curso += 1
+                    self._cond.notify_all()
+                    return
+
+                posicion = self._espera.index(ticket) + 1
+
+                if posicion == ultima_posicion:
+                    self._cond.wait(timeout=1.0)
+                    continue
+
+            # Fuera del lock: el aviso puede dibujar en la UI.
+
+            ultima_posicion = posicion
+
+            if al_esperar is not None:
+                al_esperar(posicion)
+
+
+    def _liberar(self, _futuro=None):
+
+        with self._cond:
+            self._en_curso -= 1
+            self._cond.notify_all()
+
+
+    def _reemplazar(self, executor):
+
+        # Un proceso murió (por ejemplo, por memoria).
+        # Reemplazar el pool para las próximas conversiones.
+
+        with self._cond:
+            if self._executor is executor:
+                self._executor = self._nuevo_executor()
+
+
+    def _enviar(self, fn, args):
+
+        executor = self._executor
+
+        try:
+            futuro = executor.submit(fn, *args)
+
+        except BrokenProcessPool:
+            self._reemplazar(executor)
+            self._liberar()
+            raise
+
+        # El lugar se libera cuando termina la tarea, aunque la
+        # sesión que la pidió ya no espere el resultado.
+
+        futuro.add_done_callback(self._liberar)
+
+        return executor, futuro
+
+
+    def _resultado(self, executor, futuro):
+
+        try:
+            return futuro.result()
+
+        except BrokenProcessPool:
+            self._reemplazar(executor)
+            raise
+
+
+# ============================================================
+# EJECUCIÓN EN SEGUNDO PLANO
+# ============================================================
+
+class Tarea:
+    """
+    Un mapear() corriendo en un hilo aparte.
+
+    El script de Streamlit sigue dibujando la página (vista previa,
+    avance) y consulta la tarea en cada ejecución. `posicion` es la
+    última posición informada en la cola (None si no esperó).
+    """
+
+    def __init__(self, pool, fn, lista_args, al_terminar=None):
+
+        self.posicion = None
+        self.resultados = None
+        self.error = None
+        self.segundos = None
+
+        self._al_terminar = al_terminar
+        self._limpiar = None
+        self._terminada = False
+        self._lock = threading.Lock()
+
+        self._hilo = threading.Thread(
+            target=self._correr,
+            args=(pool, fn, lista_args),
+            daemon=True,
+        )
+
+        self._hilo.start()
+
+
+    def _correr(self, pool, fn, lista_args):
+
+        inicio = time.perf_counter()
+
+        try:
+            self.resultados = pool.mapear(
+                fn,
+                lista_args,
+                al_esperar=self._al_esperar,
+            )
+
+        except BaseException as error:
+            self.error = error
+
+        self.segundos = time.perf_counter() - inicio
+
+        if self._al_terminar is not None:
+            self._al_terminar(self)
+
+        with self._lock:
+            self._terminada = True
+            limpiar = self._limpiar
+
+        if limpiar is not None and self.resultados is not None:
+            limpiar(self.resultados)
+
+
+    def _al_esperar(self, posicion: int):
+
+        self.posicion = posicion
+
+
+    def terminada(self) -> bool:
+
+        with self._lock:
+            return self._terminada
+
+
+    def resultado(self):
+        """
+        Espera a que termine y devuelve los resultados en orden
+        (o relanza el error).
+        """
+
+        self._hilo.join()
+
+        if self.error is not None:
+            raise self.error
+
+        return self.resultados
+
+
+    def descartar(self, limpiar):
+        """
+        Nadie va a usar los resultados: limpiar(resultados) se llama
+        cuando termine (o ya mismo, si terminó).
+        """
+
+        with self._lock:
+
+            if not self._terminada:
+                self._limpiar = limpiar
+                return
+
+        if self.resultados is not None:
+            limpiar(self.resultados)
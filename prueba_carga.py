@@ -0,0 +1,552 @@
+# prueba_carga.py
+# Prueba de carga multiusuario de la app de Streamlit
+# AIE San Justo
+#
+# Simula N sesiones concurrentes que suben archivos de ARCA sintéticos
+# y mide throughput, percentiles de latencia y memoria máxima para
+# cada nivel de concurrencia. Usa la API de testing de Streamlit
+# (AppTest): cada sesión ejecuta el script real.
+#
+# AppTest no admite sesiones concurrentes en un mismo proceso (cada
+# ejecución reemplaza el Runtime global de Streamlit), así que cada
+# usuario simulado corre en su propio proceso, con su propia instancia
+# de la app y de su pool. Los usuarios compiten por la CPU y la memoria
+# de la máquina, pero no comparten la cola del pool: la memoria máxima
+# incluye un proceso de la app por usuario.
+#
+# Uso:
+#   python prueba_carga.py --usuarios 1,2,4,8 --filas 5000
+#
+# Con --perfil, en lugar de la prueba de carga se mide una sola
+# conversión y se informan las constantes con las que la app estima
+# el tamaño y el avance (ver perfil()).
+#
+# La configuración del pool se toma de las mismas variables de
+# entorno que la app (IARECIBIDOS_MAX_PROCESOS, IARECIBIDOS_MAX_COLA).
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+HERE = Path(__file__).parent
+
+APP = HERE / "ia_afip_recibidos.py"
+
+MIME_XLSX = (
+    "application/vnd.openxmlformats-officedocument."
+    "spreadsheetml.sheet"
+)
+
+
+# ============================================================
+# ARCHIVOS DE ARCA SINTÉTICOS
+# ============================================================
+
+CONCEPTOS = [
+    "1 - Factura A",
+    "2 - Nota de Débito A",
+    "3 - Nota de Crédito A",
+    "6 - Factura B",
+    "7 - Nota de Débito B",
+    "8 - Nota de Crédito C",
+    "11 - Factura C",
+    "051 - Factura M",
+    "053 - Nota de Crédito M",
+    "063 - Liquidación A",
+    "81 - Tique Factura A",
+    "82 - Tique Factura B",
+]
+
+# CUITs con dígito verificador correcto, como en un archivo real.
+
+CUITS = [
+    20123456786,
+    30500010912,
+    30710000014,
+    27287654338,
+]
+
+
+def generar_arca(filas: int, semilla: int = 0) -> bytes:
+    """
+    Genera un Excel con el formato de "Mis Comprobantes Recibidos"
+    (título en la fila 1, encabezados en la fila 2).
+    """
+
+    rnd = np.random.default_rng(semilla)
+
+    def importe(prob, maximo):
+        valores = np.round(rnd.uniform(0, maximo, filas), 2)
+        return np.where(rnd.random(filas) < prob, valores, 0.0)
+
+    neto_21 = importe(0.7, 100000)
+    neto_105 = importe(0.3, 50000)
+    neto_27 = importe(0.05, 30000)
+    no_gravado = importe(0.2, 5000)
+    exentas = importe(0.1, 5000)
+    otros = importe(0.2, 2000)
+
+    usd = rnd.random(filas) < 0.05
+
+    df = pd.DataFrame({
+        "Fecha": pd.Timestamp("2024-01-01")
+        + pd.to_timedelta(rnd.integers(0, 31, filas), unit="D"),
+        "Tipo": rnd.choice(CONCEPTOS, filas),
+        "Punto de Venta": rnd.integers(1, 50, filas),
+        "Número Desde": np.arange(1, filas + 1),
+        "Número Hasta": np.arange(1, filas + 1),
+        "Cód. Autorización": rnd.integers(10**13, 10**14, filas).astype(str),
+        "Tipo Doc. Emisor": "CUIT",
+        "Nro. Doc. Emisor": rnd.choice(CUITS, filas),
+        "Denominación Emisor": [
+            f"PROVEEDOR {i}" for i in rnd.integers(1, 500, filas)
+        ],
+        "Tipo Cambio": np.where(usd, 950.0, 1.0),
+        "Moneda": np.where(usd, "USD", "$"),
+        "Neto Grav. IVA 0%": 0.0,
+        "IVA 10,5%": np.round(neto_105 * 0.105, 2),
+        "Neto Grav. IVA 10,5%": neto_105,
+        "IVA 21%": np.round(neto_21 * 0.21, 2),
+        "Neto Grav. IVA 21%": neto_21,
+        "IVA 27%": np.round(neto_27 * 0.27, 2),
+        "Neto Grav. IVA 27%": neto_27,
+        "Neto No Gravado": no_gravado,
+        "Op. Exentas": exentas,
+        "Otros Tributos": otros,
+    })
+
+    df["Imp. Total"] = np.round(
+        neto_21 * 1.21 + neto_105 * 1.105 + neto_27 * 1.27
+        + no_gravado + exentas + otros,
+        2,
+    )
+
+    buffer = BytesIO()
+
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, sheet_name="Recibidos", index=False, startrow=1)
+        writer.sheets["Recibidos"].write(0, 0, "Mis Comprobantes Recibidos")
+
+    return buffer.getvalue()
+
+
+# ============================================================
+# MEMORIA (PROCESO + PROCESOS DEL POOL)
+# ============================================================
+
+def _hijos(pid: int) -> list:
+
+    hijos = []
+
+    for tarea in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            hijos += [int(h) for h in (tarea / "children").read_text().split()]
+
+        except OSError:
+            continue
+
+    return hijos
+
+
+def rss_total() -> int:
+    """
+    RSS del proceso actual más el de sus descendientes, en bytes.
+    Solo Linux (0 en otros sistemas).
+    """
+
+    total = 0
+    pendientes = [os.getpid()]
+
+    while pendientes:
+
+        pid = pendientes.pop()
+
+        try:
+            paginas = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+
+        except (OSError, ValueError, IndexError):
+            continue
+
+        total += paginas * os.sysconf("SC_PAGE_SIZE")
+        pendientes += _hijos(pid)
+
+    return total
+
+
+class MonitorMemoria:
+    """
+    Muestrea rss_total() en un hilo y guarda el máximo.
+    """
+
+    def __init__(self, intervalo: float = 0.1):
+
+        self.intervalo = intervalo
+        self.pico = 0
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+
+        while not self._fin.is_set():
+            self.pico = max(self.pico, rss_total())
+            self._fin.wait(self.intervalo)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *args):
+        self._fin.set()
+        self._hilo.join()
+
+
+# ============================================================
+# SESIONES
+# ============================================================
+
+# Cada cuánto se vuelve a ejecutar el script mientras la conversión
+# corre en segundo plano (la latencia se mide con esta resolución).
+
+INTERVALO_SONDEO = 0.2
+
+def sesion(contenido: bytes, timeout: float) -> float:
+    """
+    Abre la app, sube el archivo y espera el resultado.
+    Devuelve la latencia en segundos (desde la subida hasta que la
+    descarga está disponible).
+    """
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    at.run()
+
+    inicio = time.perf_counter()
+
+    at.file_uploader[0].upload(
+        "Recibidos.xlsx",
+        contenido,
+        MIME_XLSX,
+    )
+
+    at.run()
+
+    # La conversión en el pool sigue en segundo plano después de la
+    # vista previa: volver a ejecutar el script (como hace el avance
+    # en el navegador) hasta que la app ofrezca la descarga.
+
+    limite = inicio + timeout
+
+    while not (at.get("download_button") or at.exception or at.error):
+
+        if time.perf_counter() > limite:
+            raise RuntimeError("La app no terminó la conversión a tiempo.")
+
+        time.sleep(INTERVALO_SONDEO)
+        at.run()
+
+    latencia = time.perf_counter() - inicio
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    if at.error:
+        raise RuntimeError(at.error[0].value)
+
+    if not at.get("download_button"):
+        raise RuntimeError("La app no ofreció la descarga.")
+
+    return latencia
+
+
+def usuario(archivos: list, timeout: float, barrera, cola):
+    """
+    Un usuario simulado, en su propio proceso: abre la app una vez
+    (como un servidor ya levantado), espera a los demás en la barrera
+    y sube sus archivos uno tras otro.
+
+    Deja en la cola (latencias, errores).
+    """
+
+    latencias = []
+    errores = []
+
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        AppTest.from_file(str(APP), default_timeout=timeout).run()
+
+        barrera.wait(timeout)
+
+        for contenido in archivos:
+
+            try:
+                latencias.append(sesion(contenido, timeout))
+
+            except Exception as e:
+                errores.append(str(e))
+
+    except Exception as e:
+        barrera.abort()
+        errores.append(str(e))
+
+    cola.put((latencias, errores))
+
+    # El pool de la app no se cierra solo: al salir, el proceso
+    # esperaría a sus procesos para siempre.
+
+    for hijo in multiprocessing.active_children():
+        hijo.terminate()
+
+
+def nivel(usuarios: int, archivos: list, repeticiones: int, timeout: float) -> dict:
+    """
+    Corre `usuarios` usuarios concurrentes, cada uno `repeticiones`
+    veces, y devuelve las estadísticas del nivel. El tiempo se mide
+    desde que todos los usuarios tienen la app abierta.
+    """
+
+    contexto = multiprocessing.get_context("spawn")
+
+    barrera = contexto.Barrier(usuarios + 1)
+    cola = contexto.Queue()
+
+    procesos = [
+        contexto.Process(
+            target=usuario,
+            args=(
+                [
+                    archivos[(i * repeticiones + r) % len(archivos)]
+                    for r in range(repeticiones)
+                ],
+                timeout,
+                barrera,
+                cola,
+            ),
+        )
+        for i in range(usuarios)
+    ]
+
+    for p in procesos:
+        p.start()
+
+    latencias = []
+    errores = []
+
+    with MonitorMemoria() as monitor:
+
+        try:
+            barrera.wait(timeout)
+
+        except threading.BrokenBarrierError:
+            pass
+
+        inicio = time.perf_counter()
+
+        for _ in procesos:
+            latencias_, errores_ = cola.get()
+            latencias += latencias_
+            errores += errores_
+
+        total = time.perf_counter() - inicio
+
+    for p in procesos:
+        p.join()
+
+    lat = np.array(latencias) if latencias else np.array([np.nan])
+
+    return {
+        "usuarios": usuarios,
+        "conversiones": len(latencias),
+        "errores": len(errores),
+        "segundos": round(total, 2),
+        "conv_por_seg": round(len(latencias) / total, 3),
+        "p50_s": round(float(np.percentile(lat, 50)), 3),
+        "p95_s": round(float(np.percentile(lat, 95)), 3),
+        "p99_s": round(float(np.percentile(lat, 99)), 3),
+        "max_s": round(float(np.max(lat)), 3),
+        "memoria_pico_mb": round(monitor.pico / 1024**2, 1),
+    }
+
+
+# ============================================================
+# PERFIL DE UNA CONVERSIÓN
+# ============================================================
+#
+# Mide las constantes de estimación de la app:
+#
+#   bytes_xml_por_fila   libro_excel.BYTES_XML_POR_FILA
+#   bytes_por_celda      conversor.BYTES_POR_CELDA
+#   <etapa>_%            AVANCE_ETAPAS de ia_afip_recibidos.py
+#
+# ============================================================
+
+def _medir_conversion(contenido: bytes):
+
+    import conversor
+    import metricas
+
+    base = metricas.memoria_actual()
+
+    # Lectura completa (sin bloques), que es lo que estima
+    # BYTES_POR_CELDA.
+
+    plan = conversor.planificar(contenido)
+    plan["modo"] = conversor.MODO_PARALELO
+
+    _, _, medidas = conversor.procesar_archivo(contenido, None, plan)
+
+    return base, medidas
+
+
+def perfil(contenido: bytes) -> dict:
+    """
+    Convierte el archivo completo en un proceso nuevo (para que la
+    memoria máxima sea solo la de esta conversión) y devuelve las
+    medidas por fila, por celda y por etapa.
+    """
+
+    import libro_excel
+
+    estimacion = libro_excel.estimar(contenido)
+
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        base, medidas = executor.submit(_medir_conversion, contenido).result()
+
+    celdas = max(1, estimacion["filas"] * estimacion["columnas"])
+    etapas = medidas["etapas"]
+    total = sum(etapas.values())
+
+    return {
+        "filas": estimacion["filas"],
+        "columnas": estimacion["columnas"],
+        "bytes_xml_por_fila": round(
+            estimacion["bytes_xml"] / max(1, estimacion["filas"])
+        ),
+        "bytes_por_celda": round((medidas["memoria_pico"] - base) / celdas),
+        **{
+            f"{etapa}_%": round(100 * segundos / total, 1)
+            for etapa, segundos in etapas.items()
+        },
+    }
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga de ARCA Recibidos → Holistor",
+    )
+    parser.add_argument(
+        "--usuarios",
+        default="1,2,4,8",
+        help="niveles de concurrencia, separados por coma",
+    )
+    parser.add_argument(
+        "--filas",
+        type=int,
+        default=5000,
+        help=(
+            "comprobantes por archivo sintético (con "
+            "IARECIBIDOS_MODO_MEMORIA_FILAS o menos, la app convierte "
+            "sin pasar por el pool)"
+        ),
+    )
+    parser.add_argument(
+        "--repeticiones",
+        type=int,
+        default=2,
+        help="conversiones por usuario en cada nivel",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=600,
+        help="segundos máximos por ejecución del script",
+    )
+    parser.add_argument(
+        "--con-cache",
+        action="store_true",
+        help="usar la caché de Parquet (por defecto se desactiva)",
+    )
+    parser.add_argument(
+        "--perfil",
+        action="store_true",
+        help="medir una conversión en lugar de la prueba de carga",
+    )
+    args = parser.parse_args(argv)
+
+    niveles = [int(n) for n in args.usuarios.split(",") if n.strip()]
+
+    if not args.con_cache:
+        os.environ["IARECIBIDOS_CACHE_MB"] = "0"
+
+    # El script de la app importa sus módulos desde su carpeta.
+    sys.path.insert(0, str(HERE))
+
+    if args.perfil:
+
+        print(
+            pd.Series(perfil(generar_arca(args.filas))).to_string()
+        )
+
+        return
+
+    from configuracion import MODO_MEMORIA_FILAS
+
+    if args.filas <= MODO_MEMORIA_FILAS:
+
+        print(
+            f"Aviso: con {args.filas} filas (<= {MODO_MEMORIA_FILAS}) "
+            "la app convierte en su propio proceso y la prueba no "
+            "pasa por el pool.",
+            file=sys.stderr,
+        )
+
+    # Un archivo distinto por conversión del nivel más grande,
+    # para no medir la caché.
+
+    cantidad = max(niveles) * args.repeticiones
+
+    print(
+        f"Generando {cantidad} archivos de {args.filas} filas...",
+        file=sys.stderr,
+    )
+
+    archivos = [
+        generar_arca(args.filas, semilla)
+        for semilla in random.sample(range(10**6), cantidad)
+    ]
+
+    resultados = []
+
+    for usuarios in niveles:
+
+        print(f"Nivel: {usuarios} usuarios...", file=sys.stderr)
+
+        resultados.append(
+            nivel(usuarios, archivos, args.repeticiones, args.timeout)
+        )
+
+    print(pd.DataFrame(resultados).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# test_comparar.py
+# Pruebas de la comparación entre dos exportaciones de ARCA
+# AIE San Justo
+
+import numpy as np
+import pandas as pd
+
+from comparar import comparar
+
+
+def exportacion(filas: int, inicio: int = 1) -> pd.DataFrame:
+    """
+    Exportación sintética: facturas A en pesos de un mismo emisor.
+    """
+
+    numeros = np.arange(inicio, inicio + filas)
+
+    return pd.DataFrame({
+        "Tipo": "1 - Factura A",
+        "Punto de Venta": 5,
+        "Número Desde": numeros,
+        "Nro. Doc. Emisor": 30500010912,
+        "Tipo Cambio": 1,
+        "Moneda": "$",
+        "Neto Grav. IVA 21%": 100 * numeros,
+        "IVA 21%": 21 * numeros,
+        "Imp. Total": 121 * numeros,
+    })
+
+
+def contar(anterior: pd.DataFrame, nuevo: pd.DataFrame) -> tuple:
+
+    return tuple(len(t) for t in comparar(anterior, nuevo))
+
+
+def test_sin_cambios():
+
+    assert contar(exportacion(500), exportacion(500)) == (0, 0, 0)
+
+
+def test_punto_de_venta_vacio_no_cambia_las_claves():
+
+    # La fila nueva sin Punto de Venta vuelve float64 a toda la
+    # columna: las 500 anteriores tienen que seguir cruzando.
+
+    nuevo = pd.concat(
+        [exportacion(500), exportacion(1, inicio=501)],
+        ignore_index=True,
+    )
+    nuevo.loc[500, "Punto de Venta"] = None
+
+    assert nuevo["Punto de Venta"].dtype == np.float64
+    assert contar(exportacion(500), nuevo) == (1, 0, 0)
+
+
+def test_tipo_cambio_con_decimales_no_modifica_los_importes():
+
+    # Un comprobante en dólares vuelve float64 a Tipo Cambio.
+
+    usd = exportacion(1, inicio=501)
+    usd["Tipo Cambio"] = 1050.5
+    usd["Moneda"] = "DOL"
+
+    nuevo = pd.concat([exportacion(500), usd], ignore_index=True)
+
+    assert nuevo["Tipo Cambio"].dtype == np.float64
+    assert contar(exportacion(500), nuevo) == (1, 0, 0)
+
+
+def test_importe_modificado():
+
+    nuevo = exportacion(500)
+    nuevo.loc[10, "Imp. Total"] += 1
+
+    nuevos, eliminados, modificados = comparar(exportacion(500), nuevo)
+
+    assert (len(nuevos), len(eliminados)) == (0, 0)
+    assert modificados["Número Desde"].tolist() == [11]
+    assert modificados["Imp. Total anterior"].tolist() == [121 * 11]
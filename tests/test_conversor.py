@@ -0,0 +1,186 @@
+# test_conversor.py
+# Pruebas de la conversión ARCA -> Holistor
+# AIE San Justo
+#
+# Los valores esperados son los que daba la conversión fila por fila
+# anterior a la vectorización (salvo 2,5% / 5%, que esa versión no
+# leía).
+
+import pandas as pd
+import pytest
+
+from conversor import CONTROL_AJUSTADO, convertir
+
+
+IMPORTES = ["Alicuota", "Neto", "IVA", "Ex/Ng", "Otros Conceptos", "Total"]
+
+
+def recibido(tipo: str, **importes) -> dict:
+    """
+    Un comprobante de ARCA con sus importes (los demás en cero).
+    """
+
+    return {
+        "Fecha": "05/03/2024",
+        "Tipo": tipo,
+        "Punto de Venta": 1,
+        "Número Desde": 1,
+        "Número Hasta": 1,
+        "Nro. Doc. Emisor": 30500010912,
+        "Denominación Emisor": "EMISOR SA",
+        "Moneda": "$",
+        "Tipo Cambio": 1,
+        "Imp. Total": 0.0,
+        **importes,
+    }
+
+
+def convertir_filas(*filas) -> pd.DataFrame:
+
+    return convertir(pd.DataFrame(filas).fillna(0.0))
+
+
+def importes(salida: pd.DataFrame) -> list:
+
+    return salida[IMPORTES].values.tolist()
+
+
+def test_alicuotas_con_ex_ng_y_otros_en_la_primera_fila():
+
+    salida = convertir_filas(recibido(
+        "1 - Factura A",
+        **{
+            "Neto Grav. IVA 21%": 100,
+            "IVA 21%": 21,
+            "Neto Grav. IVA 10,5%": 200,
+            "IVA 10,5%": 21,
+            "Neto No Gravado": 5,
+            "Op. Exentas": 3,
+            "Otros Tributos": 7,
+            "Imp. Total": 357,
+        },
+    ))
+
+    assert importes(salida) == [
+        [10.5, 200, 21, 8, 7, 236],
+        [21.0, 100, 21, 0, 0, 121],
+    ]
+    assert salida[["Tipo", "Letra"]].values.tolist() == [["F", "A"]] * 2
+
+
+def test_nota_de_credito_resta():
+
+    salida = convertir_filas(recibido(
+        "3 - Nota de Crédito A",
+        **{"Neto Grav. IVA 21%": 100, "IVA 21%": 21, "Imp. Total": 121},
+    ))
+
+    assert importes(salida) == [[21.0, -100, -21, 0, 0, -121]]
+    assert salida["Tipo"].tolist() == ["C"]
+
+
+def test_usd_por_tipo_de_cambio():
+
+    salida = convertir_filas(recibido(
+        "1 - Factura A",
+        Moneda="USD",
+        **{
+            "Tipo Cambio": 1000,
+            "Neto Grav. IVA 21%": 10,
+            "IVA 21%": 2.1,
+            "Imp. Total": 12.1,
+        },
+    ))
+
+    assert importes(salida) == [[21.0, 10000, 2100, 0, 0, 12100]]
+
+
+@pytest.mark.parametrize(
+    "tipo",
+    [
+        "6 - Factura B",
+        "7 - Nota de Débito B",
+        "81 - Tique Factura A",
+        "82 - Tique Factura B",
+    ],
+)
+def test_ajuste_de_total_y_leyenda(tipo):
+
+    salida = convertir_filas(recibido(
+        tipo,
+        **{"Neto Grav. IVA 21%": 100, "IVA 21%": 21, "Imp. Total": 130},
+    ))
+
+    assert importes(salida) == [[21.0, 100, 21, 9, 0, 130]]
+    assert salida["Control IA"].tolist() == [CONTROL_AJUSTADO]
+
+
+def test_sin_ajuste_si_el_total_coincide_o_no_es_ajustable():
+
+    salida = convertir_filas(
+        recibido(
+            "82 - Tique Factura B",
+            **{"Neto Grav. IVA 21%": 100, "IVA 21%": 21, "Imp. Total": 121},
+        ),
+        recibido(
+            "1 - Factura A",
+            **{"Neto Grav. IVA 21%": 100, "IVA 21%": 21, "Imp. Total": 130},
+        ),
+    )
+
+    assert importes(salida) == [
+        [21.0, 100, 21, 0, 0, 121],
+        [21.0, 100, 21, 0, 0, 121],
+    ]
+    assert salida["Control IA"].tolist() == ["", ""]
+
+
+def test_sin_alicuotas():
+
+    salida = convertir_filas(
+        # Solo total: va completo a Ex/Ng.
+        recibido("11 - Factura C", **{"Imp. Total": 500}),
+        # Ex/Ng y Otros discriminados: se usan esos.
+        recibido(
+            "11 - Factura C",
+            **{"Neto No Gravado": 40, "Otros Tributos": 2, "Imp. Total": 42},
+        ),
+        recibido("8 - Nota de Crédito C", **{"Imp. Total": 50}),
+    )
+
+    assert importes(salida) == [
+        [0.0, 0, 0, 500, 0, 500],
+        [0.0, 0, 0, 40, 2, 42],
+        [0.0, 0, 0, -50, 0, -50],
+    ]
+    assert salida[["Tipo", "Letra"]].values.tolist()[-1] == ["C", "B"]
+
+
+def test_descubre_alicuotas_de_2_5_y_5():
+
+    salida = convertir_filas(recibido(
+        "1 - Factura A",
+        **{
+            "Neto Grav. IVA 2,5%": 100,
+            "IVA 2,5%": 2.5,
+            "Neto Grav. IVA 5%": 100,
+            "IVA 5%": 5,
+            "Neto Grav. IVA 21%": 100,
+            "IVA 21%": 21,
+            "Op. Exentas": 10,
+            "Imp. Total": 338.5,
+        },
+    ))
+
+    assert importes(salida) == [
+        [2.5, 100, 2.5, 10, 0, 112.5],
+        [5.0, 100, 5, 0, 0, 105],
+        [21.0, 100, 21, 0, 0, 121],
+    ]
+
+
+def test_sin_importes():
+
+    salida = convertir_filas(recibido("1 - Factura A"))
+
+    assert salida.empty
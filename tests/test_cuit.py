@@ -0,0 +1,105 @@
+# test_cuit.py
+# Pruebas de normalización y validación de documentos
+# AIE San Justo
+
+import numpy as np
+import pandas as pd
+
+import cuit
+
+
+def test_cuit_valido():
+
+    numeros = np.array([
+        20123456786,
+        30500010912,
+        30710000014,
+        27287654338,
+        20123456780,    # verificador incorrecto
+        2012345678,     # 10 dígitos
+        12345678,       # DNI
+    ])
+
+    assert cuit.cuit_valido(numeros).tolist() == [
+        True, True, True, True, False, False, False,
+    ]
+
+
+def test_documentos_a_enteros():
+
+    documentos = pd.Series(
+        [20123456786.0, "27-28765433-8", " 30500010912 ", "", None, "ABC"],
+        dtype=object,
+    )
+
+    assert cuit.documentos_a_enteros(documentos).tolist() == [
+        20123456786, 27287654338, 30500010912, -1, -1, -1,
+    ]
+
+
+def test_normalizar_documentos():
+
+    documentos = pd.Series(
+        [
+            20123456786.0,      # float
+            "27-28765433-8",    # texto con guiones, CUIL
+            20123456780,        # verificador incorrecto
+            12345678,           # DNI
+            "012345678",        # DNI con cero a la izquierda
+            "02012345678",      # 11 dígitos con cero a la izquierda
+            "ABC",
+            None,
+        ],
+        dtype=object,
+    )
+
+    tipos = pd.Series(
+        ["CUIT", "CUIL", "CUIT", "DNI", "DNI", "CUIT", "CUIT", "CUIT"],
+    )
+
+    numeros, tipo_doc, valido = cuit.normalizar_documentos(documentos, tipos)
+
+    assert numeros.tolist() == [
+        "20123456786",
+        "27287654338",
+        "20123456780",
+        "12345678",
+        "12345678",
+        "02012345678",
+        "ABC",
+        None,
+    ]
+
+    assert list(tipo_doc) == [
+        cuit.TIPO_DOC_CUIT,
+        cuit.TIPO_DOC_CUIL,
+        cuit.TIPO_DOC_CUIT,
+        cuit.TIPO_DOC_DNI,
+        cuit.TIPO_DOC_DNI,
+        cuit.TIPO_DOC_CUIT,
+        cuit.TIPO_DOC_CUIT,
+        cuit.TIPO_DOC_CUIT,
+    ]
+
+    assert list(valido) == [
+        True, True, False, True, True, False, False, False,
+    ]
+
+
+def test_normalizar_documentos_vacio():
+
+    numeros, tipo_doc, valido = cuit.normalizar_documentos(
+        pd.Series([], dtype=object)
+    )
+
+    assert len(numeros) == len(tipo_doc) == len(valido) == 0
+
+
+def test_normalizar_documentos_sin_11_digitos():
+
+    numeros, tipo_doc, valido = cuit.normalizar_documentos(
+        pd.Series([12345678, "ABC"], dtype=object)
+    )
+
+    assert numeros.tolist() == ["12345678", "ABC"]
+    assert list(valido) == [True, False]
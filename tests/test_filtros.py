@@ -0,0 +1,55 @@
+# test_filtros.py
+# Pruebas de los índices de filtros sobre la salida
+# AIE San Justo
+
+import pandas as pd
+
+from filtros import IndiceSalida
+
+
+def salida(**columnas) -> pd.DataFrame:
+
+    filas = len(next(iter(columnas.values())))
+
+    base = {
+        "Fecha Emisión": ["01/03/2024"] * filas,
+        "Denominación Emisor": ["EMISOR SA"] * filas,
+        "Nro. Doc. Emisor": ["30500010912"] * filas,
+    }
+
+    return pd.DataFrame({**base, **columnas})
+
+
+def test_alicuotas_por_valor():
+
+    indice = IndiceSalida(salida(Alicuota=[21.0, 10.5, 2.5, 27.0, 5.0, 0.0]))
+
+    assert indice.valores("Alicuota") == [0.0, 2.5, 5.0, 10.5, 21.0, 27.0]
+
+
+def test_alicuota_vacia_primero():
+
+    indice = IndiceSalida(salida(Alicuota=[21.0, None, 10.5]))
+
+    assert indice.valores("Alicuota") == ["", 10.5, 21.0]
+
+
+def test_texto_y_mezclas_como_texto():
+
+    indice = IndiceSalida(salida(
+        Tipo=["F", "C", "D"],
+        Letra=["B", 1, "A"],
+    ))
+
+    assert indice.valores("Tipo") == ["C", "D", "F"]
+    assert indice.valores("Letra") == [1, "A", "B"]
+
+
+def test_control_ia_por_leyenda():
+
+    indice = IndiceSalida(salida(**{
+        "Control IA": ["", "B | A", "A"],
+    }))
+
+    assert indice.valores("Control IA") == ["", "A", "B"]
+    assert len(indice.filtrar({"Control IA": ["A"]})) == 2
@@ -0,0 +1,81 @@
+# test_historico.py
+# Pruebas del histórico acumulado en Parquet
+# AIE San Justo
+
+import pandas as pd
+import pytest
+
+import historico
+from conversor import convertir
+
+
+@pytest.fixture(autouse=True)
+def carpeta_historico(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(historico, "HISTORICO_DIR", tmp_path)
+
+
+def recibidos(numeros, fechas, autorizaciones) -> pd.DataFrame:
+    """
+    Archivo de ARCA ya leído: facturas A de $121 de un emisor.
+    """
+
+    return pd.DataFrame({
+        "Fecha": pd.Series(fechas, dtype=object),
+        "Tipo": "1 - Factura A",
+        "Punto de Venta": 5,
+        "Número Desde": numeros,
+        "Número Hasta": numeros,
+        "Cód. Autorización": pd.Series(autorizaciones, dtype=object),
+        "Nro. Doc. Emisor": 30500010912,
+        "Denominación Emisor": "EMISOR SA",
+        "Tipo Cambio": 1,
+        "Moneda": "$",
+        "Neto Grav. IVA 21%": 100.0,
+        "IVA 21%": 21.0,
+        "Imp. Total": 121.0,
+    })
+
+
+def test_agregar_con_tipos_mezclados():
+
+    # Fechas como Timestamp y como texto, autorizaciones como número
+    # y como texto: antes to_parquet fallaba con ArrowTypeError.
+
+    primera = convertir(recibidos(
+        [1, 2],
+        [pd.Timestamp("2024-03-04"), "05/03/2024"],
+        [74123456789012, "74123456789013"],
+    ))
+
+    agregado, _ = historico.agregar(primera, "Cliente")
+
+    assert agregado["periodos"] == [(2024, 3, 2, 2)]
+
+    # El comprobante 2 vuelve (ahora con autorización numérica)
+    # y reemplaza al guardado.
+
+    segunda = convertir(recibidos(
+        [2, 3],
+        ["05/03/2024", "06/03/2024"],
+        [74123456789013.0, 74123456789014],
+    ))
+
+    agregado, _ = historico.agregar(segunda, "Cliente")
+
+    assert agregado["periodos"] == [(2024, 3, 2, 3)]
+
+    acumulado = historico.leer_acumulado("Cliente", 2024)
+
+    assert sorted(acumulado["Número Desde"]) == [1, 2, 3]
+    assert sorted(acumulado["Cód. Autorización"]) == [
+        "74123456789012",
+        "74123456789013",
+        "74123456789014",
+    ]
+    assert (acumulado["Fecha Emisión"].dt.month == 3).all()
+
+    excel_bytes, medidas = historico.exportar_acumulado("Cliente", 2024)
+
+    assert excel_bytes
+    assert medidas["filas_salida"] == 3